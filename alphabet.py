@@ -0,0 +1,51 @@
+"""Character classes and partitioning of sigma into equivalent letters.
+
+Two letters are equivalent in an automaton if every state has exactly the
+same edges by both of them. Determinization and minimization only need one
+representative letter per class, which matters for large (byte or Unicode)
+alphabets where most letters behave the same.
+"""
+
+from collections import defaultdict
+
+
+def letter_range(first, last):
+    """Letters from ``first`` to ``last`` inclusive, like ``a-z``."""
+    if ord(first) > ord(last):
+        raise ValueError("bad letter range {}-{}".format(first, last))
+    return [chr(code) for code in range(ord(first), ord(last) + 1)]
+
+
+def char_class(spec):
+    """Set of letters of a class body such as ``a-z0-9_``.
+
+    A ``-`` that is first or last stands for itself.
+    """
+    letters = set()
+    pos = 0
+    while pos < len(spec):
+        if pos + 2 < len(spec) and spec[pos + 1] == "-":
+            letters.update(letter_range(spec[pos], spec[pos + 2]))
+            pos += 3
+        else:
+            letters.add(spec[pos])
+            pos += 1
+    return frozenset(letters)
+
+
+def alphabet_classes(finite_automation):
+    """Partition of sigma into classes of equivalent letters.
+
+    Classes are lists of sorted letters, ordered by their first letter; the
+    first letter of a class is its representative. Runs in O(|edges|).
+    """
+    edges = defaultdict(set)
+    sigma = finite_automation.sigma
+    for state in list(finite_automation.transition_function):
+        for state_to, letter in finite_automation.get_edges_from(state):
+            if letter in sigma:
+                edges[letter].add((state, state_to))
+    classes = {}
+    for letter in sorted(sigma):
+        classes.setdefault(frozenset(edges.get(letter, ())), []).append(letter)
+    return list(classes.values())
@@ -0,0 +1,264 @@
+import argparse
+import json
+import math
+import random
+import timeit
+
+from finite_automations import DFA, FiniteAutomation, NFA
+from latex_format import latex_format
+from lazy_dfa import LazyDFA
+from packed import PackedDFA, all_encoded_words
+
+
+def nth_from_end_nfa(n, sigma="ab"):
+    """NFA of words whose n-th letter from the end is the first letter of sigma.
+
+    Its minimal DFA has 2^n states.
+    """
+    letters = sorted(sigma)
+    nfa = NFA(letters)
+    nfa.set_start_state(0)
+    for letter in letters:
+        nfa.add_transition(0, 0, letter)
+    nfa.add_transition(0, 1, letters[0])
+    for state in range(1, n):
+        for letter in letters:
+            nfa.add_transition(state, state + 1, letter)
+    nfa.add_terminal_state(n)
+    return nfa
+
+
+def random_nfa(states_count, sigma="ab", edges_per_state=2, seed=0):
+    """Random sparse NFA with about edges_per_state edges per state."""
+    rnd = random.Random(seed)
+    letters = sorted(sigma)
+    nfa = NFA(letters)
+    nfa.set_start_state(0)
+    for state in range(states_count):
+        nfa.add_state(state)
+        for _ in range(edges_per_state):
+            nfa.add_transition(state, rnd.randrange(states_count), rnd.choice(letters))
+        if rnd.random() < 0.2:
+            nfa.add_terminal_state(state)
+    return nfa
+
+
+def large_alphabet_nfa(states_count, letters_count=64, seed=0):
+    """Random sparse NFA over letters_count printable letters."""
+    sigma = [chr(ord("!") + idx) for idx in range(letters_count)]
+    return random_nfa(states_count, sigma, edges_per_state=8, seed=seed)
+
+
+FAMILIES = {
+    "nth_from_end": (nth_from_end_nfa, [6, 8, 10, 12, 14]),
+    "random_nfa": (lambda size: random_nfa(size, seed=size), [20, 30, 40, 50]),
+    "large_alphabet": (large_alphabet_nfa, [20, 40, 80, 160]),
+}
+STAGES = [
+    "from_nfa",
+    "renumbered",
+    "minimized",
+    "find_not_eq_word",
+    "accept",
+    "latex_format",
+]
+
+
+def random_words(sigma, count, length, seed=0):
+    rnd = random.Random(seed)
+    letters = sorted(sigma)
+    return ["".join(rnd.choice(letters) for _ in range(length)) for _ in range(count)]
+
+
+def bench(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_accept(n=8, count=2000, length=100):
+    dfa = DFA.from_nfa(nth_from_end_nfa(n)).renumbered().minimized()
+    packed = PackedDFA.from_dfa(dfa)
+    words = random_words(dfa.sigma, count, length)
+
+    def iterator_accept():
+        for word in words:
+            FiniteAutomation.accept(dfa, word)
+
+    results = {
+        "FiniteAutomation.accept": bench(iterator_accept),
+        "DFA.accept_many": bench(lambda: sum(dfa.accept_many(words))),
+        "PackedDFA.accept_many": bench(lambda: sum(packed.accept_many(words))),
+    }
+    print("accept: {} words of length {}".format(count, length))
+    for name, seconds in results.items():
+        print("  {:<24} {:.4f}s".format(name, seconds))
+    return results
+
+
+def bench_accept_array(n=8, length=14):
+    dfa = DFA.from_nfa(nth_from_end_nfa(n)).renumbered().minimized()
+    packed = PackedDFA.from_dfa(dfa)
+    encoded = all_encoded_words(len(packed.letters), length)
+    words = ["".join(packed.letters[idx] for idx in row) for row in encoded]
+
+    results = {
+        "PackedDFA.accept_many": bench(lambda: sum(packed.accept_many(words))),
+        "PackedDFA.accept_array": bench(lambda: packed.accept_array(encoded).sum()),
+    }
+    print("exhaustive: {} words of length {}".format(len(words), length))
+    for name, seconds in results.items():
+        print("  {:<24} {:.4f}s".format(name, seconds))
+    return results
+
+
+def bench_lazy_accept(n=16, count=2000, length=100):
+    nfa = nth_from_end_nfa(n)
+    words = random_words(nfa.sigma, count, length)
+    lazy = LazyDFA(nfa, cache_size=4096)
+
+    results = {
+        "NFA.accept_many": bench(lambda: sum(nfa.accept_many(words)), repeat=1),
+        "LazyDFA.accept_many": bench(lambda: sum(lazy.accept_many(words))),
+    }
+    print(
+        "lazy: {} words of length {}, full DFA has 2^{} states".format(count, length, n)
+    )
+    for name, seconds in results.items():
+        print("  {:<24} {:.4f}s".format(name, seconds))
+    return results
+
+
+def bench_minimal_strategies():
+    nfas = {
+        "nth_from_end(12)": nth_from_end_nfa(12),
+        "reversed nth_from_end(12)": nth_from_end_nfa(12).reversed(),
+        "random_nfa(40)": random_nfa(40, seed=1),
+        "random_nfa(30, 4 letters)": random_nfa(30, "abcd", 3, seed=2),
+    }
+    results = {}
+    print("NFA -> minimal DFA")
+    for name, nfa in nfas.items():
+        sizes = set()
+        for strategy in ("subset", "brzozowski"):
+            seconds = bench(lambda: DFA.minimal_from_nfa(nfa, strategy), repeat=1)
+            sizes.add(len(DFA.minimal_from_nfa(nfa, strategy).states))
+            results[(name, strategy)] = seconds
+            print("  {:<28} {:<12} {:.4f}s".format(name, strategy, seconds))
+        assert len(sizes) == 1, "strategies disagree on {}".format(name)
+    return results
+
+
+def bench_pipeline_once(nfa, words):
+    """Seconds per stage of NFA -> minimal DFA and the DFA size."""
+    times = {}
+    timer = timeit.default_timer
+
+    start = timer()
+    dfa = DFA.from_nfa(nfa)
+    times["from_nfa"] = timer() - start
+    start = timer()
+    renumbered = dfa.renumbered()
+    times["renumbered"] = timer() - start
+    start = timer()
+    minimal = renumbered.minimized()
+    times["minimized"] = timer() - start
+    start = timer()
+    assert dfa.find_not_eq_word(minimal) is None
+    times["find_not_eq_word"] = timer() - start
+    start = timer()
+    sum(minimal.accept_many(words))
+    times["accept"] = timer() - start
+    start = timer()
+    latex_format(minimal)
+    times["latex_format"] = timer() - start
+    return times, len(dfa.states), len(minimal.states)
+
+
+def bench_pipeline(families=None, repeat=3):
+    """{family: {size: {stage: seconds, "dfa_states", "min_dfa_states"}}}."""
+    results = {}
+    for family in families or sorted(FAMILIES):
+        generator, sizes = FAMILIES[family]
+        results[family] = {}
+        for size in sizes:
+            nfa = generator(size)
+            words = random_words(nfa.sigma, 1000, 50)
+            runs = [bench_pipeline_once(nfa, words) for _ in range(repeat)]
+            entry = {
+                stage: min(times[stage] for times, _, _ in runs) for stage in STAGES
+            }
+            entry["dfa_states"] = runs[0][1]
+            entry["min_dfa_states"] = runs[0][2]
+            results[family][str(size)] = entry
+    return results
+
+
+def scaling_exponent(points):
+    """Least squares slope of log(seconds) over log(states)."""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 1 and y > 0]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return cov / var if var else float("nan")
+
+
+def print_pipeline(results, baseline=None):
+    for family, sizes in results.items():
+        print("pipeline: {}".format(family))
+        print(
+            "  {:>6} {:>8} {:>8} ".format("size", "dfa", "min_dfa")
+            + " ".join("{:>16}".format(stage) for stage in STAGES)
+        )
+        for size, entry in sizes.items():
+            cells = []
+            for stage in STAGES:
+                cell = "{:.4f}".format(entry[stage])
+                old = (baseline or {}).get(family, {}).get(size, {}).get(stage)
+                if old:
+                    cell += " x{:.2f}".format(entry[stage] / old)
+                cells.append("{:>16}".format(cell))
+            print(
+                "  {:>6} {:>8} {:>8} ".format(
+                    size, entry["dfa_states"], entry["min_dfa_states"]
+                )
+                + " ".join(cells)
+            )
+        exponents = []
+        for stage in STAGES:
+            points = [(entry["dfa_states"], entry[stage]) for entry in sizes.values()]
+            exponents.append("{:>16.2f}".format(scaling_exponent(points)))
+        print("  {:>24} ".format("exponent") + " ".join(exponents))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="automaton benchmarks")
+    parser.add_argument("--suite", choices=("pipeline", "micro", "all"), default="all")
+    parser.add_argument("--family", action="append", choices=sorted(FAMILIES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="save pipeline results as JSON")
+    parser.add_argument(
+        "--compare", help="JSON saved by --output on another commit to compare with"
+    )
+    args = parser.parse_args()
+
+    if args.suite in ("micro", "all"):
+        bench_accept()
+        bench_accept_array()
+        bench_lazy_accept()
+        bench_minimal_strategies()
+    if args.suite in ("pipeline", "all"):
+        results = bench_pipeline(args.family, args.repeat)
+        baseline = None
+        if args.compare:
+            with open(args.compare) as file:
+                baseline = json.load(file)
+        print_pipeline(results, baseline)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
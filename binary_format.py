@@ -0,0 +1,132 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from finite_automations import DFA
+from packed import PackedDFA
+
+MAGIC = b"FADFA\0\0\0"
+VERSION = 1
+# magic, version, states_count, letters_count, start_state, alphabet size
+HEADER = struct.Struct("<8sIIIiI")
+LETTER_SIZE = struct.Struct("<I")
+
+
+class TerminalBitset(object):
+    """Read-only terminal flags over a bitset, bit i of byte j is state 8j+i."""
+
+    def __init__(self, bits, states_count):
+        self.bits = bits
+        self.states_count = states_count
+
+    def __getitem__(self, state):
+        return self.bits[state >> 3] >> (state & 7) & 1
+
+    def __len__(self):
+        return self.states_count
+
+    def __bytes__(self):
+        return bytes(self[state] for state in range(self.states_count))
+
+
+def padding_(size):
+    return -size % 4
+
+
+def dump(dfa, file):
+    """Write ``dfa`` (DFA or PackedDFA) to a binary file object.
+
+    Layout: header, alphabet (length-prefixed UTF-8 letters), padding to 4
+    bytes, int32 column of every letter, int32 transition table, terminal
+    bitset; integers are little-endian.
+    """
+    if isinstance(dfa, DFA):
+        dfa = PackedDFA.from_dfa(dfa)
+    alphabet = b""
+    for letter in dfa.letters:
+        encoded = str(letter).encode("utf-8")
+        alphabet += LETTER_SIZE.pack(len(encoded)) + encoded
+    file.write(
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            dfa.states_count,
+            len(dfa.letters),
+            dfa.start_state,
+            len(alphabet),
+        )
+    )
+    file.write(alphabet + b"\0" * padding_(HEADER.size + len(alphabet)))
+
+    for values in (dfa.columns, dfa.table):
+        values = array("i", values)
+        if sys.byteorder != "little":
+            values.byteswap()
+        file.write(values.tobytes())
+
+    bits = bytearray((dfa.states_count + 7) // 8)
+    for state in range(dfa.states_count):
+        if dfa.terminal[state]:
+            bits[state >> 3] |= 1 << (state & 7)
+    file.write(bits)
+
+
+def save(dfa, path):
+    with open(path, "wb") as file:
+        dump(dfa, file)
+
+
+def load(path):
+    """Map a file written by dump and return a PackedDFA over it.
+
+    The transition table and terminal bitset are views into the mapping, so
+    loading costs O(|sigma|) regardless of the automaton size.
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(mapped)
+
+
+def loads(buffer):
+    """PackedDFA over any buffer (bytes, mmap, ...) in the dump format."""
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, states_count, letters_count, start_state, alphabet_size = (
+        HEADER.unpack_from(view)
+    )
+    if magic != MAGIC:
+        raise ValueError("not a compiled DFA file")
+    if version != VERSION:
+        raise ValueError("unsupported version {}".format(version))
+
+    offset = HEADER.size
+    letters = []
+    for _ in range(letters_count):
+        (size,) = LETTER_SIZE.unpack_from(view, offset)
+        offset += LETTER_SIZE.size
+        letters.append(bytes(view[offset : offset + size]).decode("utf-8"))
+        offset += size
+    offset += padding_(offset)
+
+    columns_size = letters_count * 4
+    if len(view) < offset + columns_size:
+        raise ValueError("truncated file")
+    columns = array("i", view[offset : offset + columns_size].cast("i"))
+    if sys.byteorder != "little":
+        columns.byteswap()
+    columns_count = max(columns) + 1 if letters_count else 0
+    offset += columns_size
+
+    table_size = states_count * columns_count * 4
+    bits_size = (states_count + 7) // 8
+    if len(view) < offset + table_size + bits_size:
+        raise ValueError("truncated file")
+    table = view[offset : offset + table_size].cast("i")
+    if sys.byteorder != "little":
+        table = array("i", table)
+        table.byteswap()
+    offset += table_size
+    terminal = TerminalBitset(view[offset : offset + bits_size], states_count)
+    return PackedDFA(letters, states_count, table, start_state, terminal, columns)
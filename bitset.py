@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+class BitsetNFA(object):
+    """NFA with state sets encoded as int bitmasks, bit i is the i-th state.
+
+    Successor masks are precomputed per letter and already eps-closed, so a
+    step of the subset construction is an OR over the set bits of a mask.
+    Only ``letters`` (default: all of sigma) get successor masks, so callers
+    can pass one representative per class of equivalent letters. The start
+    mask is the closure of ``start_states``, by default of the start state.
+    """
+
+    def __init__(self, nfa, letters=None, start_states=None):
+        states = set(nfa.states) | set(nfa.terminal_states)
+        states.update(nfa.transition_function)
+        if nfa.start_state is not None:
+            states.add(nfa.start_state)
+        self.sigma = nfa.sigma if letters is None else frozenset(letters)
+        self.states = list(states)
+        self.index = {state: idx for idx, state in enumerate(self.states)}
+
+        closure_masks = [
+            self.mask_of(nfa.eps_closure({state})) for state in self.states
+        ]
+        self.successors = {}
+        for letter in self.sigma:
+            successors = []
+            for state in self.states:
+                mask = 0
+                for state_to in nfa.transition_function[state][letter]:
+                    mask |= closure_masks[self.index[state_to]]
+                successors.append(mask)
+            self.successors[letter] = successors
+
+        if start_states is None:
+            start_states = [] if nfa.start_state is None else [nfa.start_state]
+        self.start = 0
+        for state in start_states:
+            self.start |= closure_masks[self.index[state]]
+        self.terminal = self.mask_of(nfa.terminal_states)
+        self.tagged = [
+            (1 << self.index[state], tags) for state, tags in nfa.tags.items()
+        ]
+
+    def mask_of(self, states):
+        mask = 0
+        for state in states:
+            mask |= 1 << self.index[state]
+        return mask
+
+    def step(self, mask, letter):
+        successors = self.successors[letter]
+        res = 0
+        while mask:
+            low = mask & -mask
+            res |= successors[low.bit_length() - 1]
+            mask ^= low
+        return res
+
+    def is_terminal(self, mask) -> bool:
+        return bool(mask & self.terminal)
+
+    def tags_of(self, mask):
+        res = set()
+        for bit, tags in self.tagged:
+            if mask & bit:
+                res.update(tags)
+        return frozenset(res)
+
+
+worker_bitset_ = None
+
+
+def init_worker_(bitset):
+    global worker_bitset_
+    worker_bitset_ = bitset
+
+
+def expand_in_worker_(masks, letters):
+    step = worker_bitset_.step
+    return [[step(mask, letter) for letter in letters] for mask in masks]
+
+
+class SubsetExpander(object):
+    """Successor masks for a whole BFS level of the subset construction.
+
+    With ``workers`` > 1 levels of at least ``min_parallel_level`` masks are
+    split into chunks and expanded by a process pool; every worker receives
+    the BitsetNFA once, at start. Results keep the order of the level and of
+    ``letters``, so the coordinator numbers states exactly as a serial BFS.
+    """
+
+    def __init__(self, bitset, letters, workers=None, min_parallel_level=64):
+        self.bitset = bitset
+        self.letters = list(letters)
+        self.workers = workers
+        self.min_parallel_level = min_parallel_level
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers is not None and self.workers > 1:
+            self.executor = ProcessPoolExecutor(
+                self.workers, initializer=init_worker_, initargs=(self.bitset,)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return False
+
+    def expand(self, masks):
+        """Yield (mask, [successor mask for each letter]) for every mask."""
+        if self.executor is None or len(masks) < self.min_parallel_level:
+            step = self.bitset.step
+            for mask in masks:
+                yield mask, [step(mask, letter) for letter in self.letters]
+            return
+        chunk_size = -(-len(masks) // (self.workers * 4))
+        chunks = [masks[i : i + chunk_size] for i in range(0, len(masks), chunk_size)]
+        results = self.executor.map(
+            expand_in_worker_, chunks, [self.letters] * len(chunks)
+        )
+        for chunk, successors in zip(chunks, results):
+            for mask, next_masks in zip(chunk, successors):
+                yield mask, next_masks
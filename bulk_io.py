@@ -0,0 +1,127 @@
+"""Non-interactive readers and writers of automata.
+
+Transition-list format is what FiniteAutomation.from_input reads:
+
+    sigma
+    state_from state_to letter      (one line per edge, "eps" for eps)
+    end                             (any line that is not an edge)
+    start_state
+    terminal_state terminal_state ...
+
+JSON format: {"sigma": [...], "start_state": s, "terminal_states": [...],
+"transitions": [[state_from, state_to, letter], ...]} with null for eps.
+States are integers in both formats.
+"""
+
+import json
+
+from common import eps
+from finite_automations import NFA
+
+
+def read_transition_list(lines, cls=NFA):
+    lines = iter(lines)
+    try:
+        sigma = next(lines).rstrip("\r\n")
+    except StopIteration:
+        raise ValueError("empty input")
+    finite_automation = cls(sigma)
+
+    transitions = []
+    line_number = 1
+    start_line = None
+    for line in lines:
+        line_number += 1
+        parts = line.split()
+        if len(parts) != 3:
+            start_line = next(lines, None)
+            line_number += 1
+            break
+        state_from, state_to, letter = parts
+        letter = eps if letter == "eps" else letter
+        if not finite_automation.is_valid_letter_(letter):
+            raise ValueError(
+                "line {}: letter {!r} is not in sigma".format(line_number, letter)
+            )
+        try:
+            transitions.append((int(state_from), int(state_to), letter))
+        except ValueError:
+            raise ValueError("line {}: bad transition {!r}".format(line_number, line))
+    if start_line is None or not start_line.strip():
+        raise ValueError("line {}: start_state expected".format(line_number))
+    try:
+        start_state = int(start_line)
+    except ValueError:
+        raise ValueError(
+            "line {}: bad start_state {!r}".format(line_number, start_line)
+        )
+    terminal_line = next(lines, "")
+    line_number += 1
+    try:
+        terminal_states = [int(state) for state in terminal_line.split()]
+    except ValueError:
+        raise ValueError(
+            "line {}: bad terminal states {!r}".format(line_number, terminal_line)
+        )
+
+    finite_automation.add_transitions(transitions)
+    finite_automation.set_start_state(start_state)
+    for state in terminal_states:
+        finite_automation.add_terminal_state(state)
+    return finite_automation
+
+
+def write_transition_list(finite_automation, file):
+    file.write("".join(sorted(finite_automation.sigma)) + "\n")
+    for state in sorted(finite_automation.states):
+        for state_to, letter in finite_automation.get_edges_from(state):
+            file.write("{} {} {}\n".format(state, state_to, letter))
+    file.write("end\n")
+    file.write("{}\n".format(finite_automation.start_state))
+    file.write(" ".join(map(str, sorted(finite_automation.terminal_states))) + "\n")
+
+
+def read_json(file, cls=NFA):
+    data = json.load(file)
+    finite_automation = cls(data["sigma"])
+    finite_automation.add_transitions(
+        (state_from, state_to, eps if letter is None else letter)
+        for state_from, state_to, letter in data["transitions"]
+    )
+    if data.get("start_state") is not None:
+        finite_automation.set_start_state(data["start_state"])
+    for state in data.get("terminal_states", []):
+        finite_automation.add_terminal_state(state)
+    return finite_automation
+
+
+def write_json(finite_automation, file):
+    transitions = []
+    for state in sorted(finite_automation.states):
+        for state_to, letter in finite_automation.get_edges_from(state):
+            transitions.append([state, state_to, None if letter == eps else letter])
+    json.dump(
+        {
+            "sigma": sorted(finite_automation.sigma),
+            "start_state": finite_automation.start_state,
+            "terminal_states": sorted(finite_automation.terminal_states),
+            "transitions": transitions,
+        },
+        file,
+    )
+
+
+def load(path, cls=NFA):
+    """Read an automaton from ``path``; *.json is JSON, anything else a list."""
+    with open(path) as file:
+        if path.endswith(".json"):
+            return read_json(file, cls)
+        return read_transition_list(file, cls)
+
+
+def save(finite_automation, path):
+    with open(path, "w") as file:
+        if path.endswith(".json"):
+            write_json(finite_automation, file)
+        else:
+            write_transition_list(finite_automation, file)
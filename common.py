@@ -1,3 +1,8 @@
+from collections import OrderedDict
+
+import instrumentation
+
+
 def alignment(rows):
     maxlen = [0 for _ in rows[0]]
     for row in rows:
@@ -19,3 +24,56 @@ class Eps(object):
 
 
 eps = Eps()
+
+
+class Acceptor(object):
+    """Anything with ``accept(word)``."""
+
+    def accept(self, word) -> bool:
+        raise NotImplementedError
+
+    def accept_many(self, words):
+        """Lazily yield accept(word) for every word of the iterable."""
+        for word in words:
+            yield self.accept(word)
+
+
+class LRUCache(object):
+    """Mapping of at most ``size`` entries that drops the least recently used.
+
+    Hits and misses are counted here and, while instrumentation is active,
+    as the ``name.hits`` and ``name.misses`` counters.
+    """
+
+    def __init__(self, size, name):
+        assert size > 0, "cache size must be positive"
+        self.size = size
+        self.name = name
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Cached value of ``key``, computed as ``compute(*key)`` on a miss."""
+        entries = self.entries
+        value = entries.get(key)
+        stats = instrumentation.active
+        if value is None:
+            self.misses += 1
+            if stats is not None:
+                stats.add(self.name + ".misses")
+            value = entries[key] = compute(*key)
+            if len(entries) > self.size:
+                entries.popitem(last=False)
+        else:
+            self.hits += 1
+            if stats is not None:
+                stats.add(self.name + ".hits")
+            entries.move_to_end(key)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
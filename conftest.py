@@ -1,3 +1,6 @@
+from language_compare import find_first_mismatch
+
+
 def rec_build(prefix, remainder_len, sigma, words):
     if remainder_len == 0:
         words.append("".join(prefix))
@@ -24,5 +27,5 @@ def words_generator(max_len, sigma):
 
 def assert_compare_fa(first, second, word_len):
     assert first.sigma == second.sigma
-    for word in words_generator(word_len, first.sigma):
-        assert first.accept(word) == second.accept(word)
+    word = find_first_mismatch(first, second, word_len)
+    assert word is None, "automations differ on {!r}".format(word)
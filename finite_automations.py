@@ -1,12 +1,21 @@
+import operator
 from collections import defaultdict, deque
 
 import attr
 
-from common import alignment, eps
+import instrumentation
+from alphabet import alphabet_classes
+from bitset import BitsetNFA, SubsetExpander
+from common import Acceptor, LRUCache, alignment, eps
+from minimization import hopcroft_partition
 
 
-class FiniteAutomation(object):
-    @attr.s(frozen=True)
+class TooManyStatesError(RuntimeError):
+    pass
+
+
+class FiniteAutomation(Acceptor):
+    @attr.s(frozen=True, slots=True)
     class Iterator(object):
         def transition(self, letter):
             raise NotImplementedError
@@ -57,6 +66,7 @@ class FiniteAutomation(object):
         self.start_state = start_state
         self.terminal_states = set(terminal_states) if terminal_states else set()
         self.states = set(states) if states is not None else set()
+        self.tags = {}
 
         if start_state is not None:
             self.states.add(start_state)
@@ -71,6 +81,33 @@ class FiniteAutomation(object):
     def add_transition(self, state_from, state_to, letter) -> None:
         raise NotImplementedError
 
+    def add_transitions(self, transitions):
+        """Add many (state_from, state_to, letter) edges, checking sigma first."""
+        transitions = list(transitions)
+        for state_from, state_to, letter in transitions:
+            if not self.is_valid_letter_(letter):
+                raise ValueError(
+                    "{} -> {}: letter {!r} is not in sigma".format(
+                        state_from, state_to, letter
+                    )
+                )
+        self.add_transitions_(transitions)
+        states = set()
+        for state_from, state_to, _ in transitions:
+            states.add(state_from)
+            states.add(state_to)
+        self.states.update(states)
+
+    def add_class_transition(self, state_from, state_to, letters):
+        """One edge per letter of ``letters``, e.g. a char_class."""
+        self.add_transitions((state_from, state_to, letter) for letter in letters)
+
+    def is_valid_letter_(self, letter):
+        return letter in self.sigma
+
+    def add_transitions_(self, transitions):
+        raise NotImplementedError
+
     def add_state(self, state):
         self.states.add(state)
 
@@ -78,6 +115,21 @@ class FiniteAutomation(object):
         self.add_state(state)
         self.terminal_states.add(state)
 
+    def add_terminal_tag(self, state, tag):
+        """Make ``state`` terminal and mark it as accepting pattern ``tag``."""
+        self.add_terminal_state(state)
+        self.tags[state] = self.tags.get(state, frozenset()) | {tag}
+
+    def tags_of(self, states):
+        res = set()
+        for state in states:
+            res.update(self.tags.get(state, ()))
+        return frozenset(res)
+
+    def state_class_(self, state):
+        """States of different classes are never equivalent."""
+        return state in self.terminal_states, self.tags.get(state, frozenset())
+
     def set_start_state(self, state):
         self.add_state(state)
         self.start_state = state
@@ -91,9 +143,24 @@ class FiniteAutomation(object):
     def get_states_from(self, state, sigma):
         raise NotImplementedError
 
+    def reversed(self):
+        """NFA of the reversed language."""
+        mapping = {state: idx for idx, state in enumerate(self.states)}
+        start_state = len(mapping)
+        nfa = NFA(self.sigma)
+        nfa.set_start_state(start_state)
+        for state, idx in mapping.items():
+            for state_to, letter in self.get_edges_from(state):
+                nfa.add_transition(mapping[state_to], idx, letter)
+        for state in self.terminal_states:
+            nfa.add_transition(start_state, mapping[state], eps)
+        if self.start_state is not None:
+            nfa.add_terminal_state(mapping[self.start_state])
+        return nfa
+
 
 class NFA(FiniteAutomation):
-    @attr.s(frozen=True)
+    @attr.s(frozen=True, slots=True)
     class Iterator(FiniteAutomation.Iterator):
         nfa = attr.ib()
         states = attr.ib()
@@ -102,10 +169,7 @@ class NFA(FiniteAutomation):
             object.__setattr__(self, "states", self.eps_closure_(self.states))
 
         def transition(self, letter):
-            new_states = set()
-            for state in self.states:
-                new_states.update(self.nfa.transition_function[state][letter])
-            return NFA.Iterator(self.nfa, new_states)
+            return self.nfa.next_iterator_(self, letter)
 
         def is_terminal(self) -> bool:
             for state in self.states:
@@ -114,14 +178,10 @@ class NFA(FiniteAutomation):
             return False
 
         def eps_closure_(self, states):
-            state_queue = deque(states)
-            while len(state_queue):
-                new_state = state_queue.popleft()
-                states.add(new_state)
-                for state in self.nfa.transition_function[new_state][eps]:
-                    if state not in states:
-                        state_queue.append(state)
-            return frozenset(states)
+            return self.nfa.eps_closure(states)
+
+    # bound of the (state set, letter) -> next iterator memo
+    memo_size = 4096
 
     def __init__(self, sigma, states=None, start_state=None, terminal_states=None):
         super().__init__(
@@ -131,16 +191,169 @@ class NFA(FiniteAutomation):
             terminal_states=terminal_states,
         )
         self.transition_function = defaultdict(lambda: defaultdict(set))
+        self.eps_closures_ = None
+        self.transition_memo = LRUCache(self.memo_size, "nfa_transition")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["transition_memo"] = LRUCache(self.transition_memo.size, "nfa_transition")
+        state["transition_function"] = {
+            state_from: dict(edges)
+            for state_from, edges in self.transition_function.items()
+        }
+        return state
+
+    def __setstate__(self, state):
+        transition_function = state.pop("transition_function")
+        self.__dict__.update(state)
+        self.transition_function = defaultdict(lambda: defaultdict(set))
+        for state_from, edges in transition_function.items():
+            self.transition_function[state_from].update(edges)
 
     def add_transition(self, state_from, state_to, letter) -> None:
         assert letter == eps or letter in self.sigma
         self.states.add(state_to)
         self.states.add(state_from)
         self.transition_function[state_from][letter].add(state_to)
+        self.transition_memo.clear()
+        if letter == eps:
+            self.eps_closures_ = None
+
+    def is_valid_letter_(self, letter):
+        return letter == eps or letter in self.sigma
+
+    def add_transitions_(self, transitions):
+        transition_function = self.transition_function
+        for state_from, state_to, letter in transitions:
+            transition_function[state_from][letter].add(state_to)
+        self.transition_memo.clear()
+        self.eps_closures_ = None
+
+    def next_iterator_(self, iterator, letter):
+        return self.transition_memo.get((iterator.states, letter), self.step_)
+
+    def step_(self, states, letter):
+        new_states = set()
+        for state in states:
+            new_states.update(self.transition_function[state][letter])
+        return NFA.Iterator(self, new_states)
+
+    def eps_closures(self):
+        """Map state -> eps closure, for states with outgoing eps edges."""
+        stats = instrumentation.active
+        if self.eps_closures_ is None:
+            if stats is not None:
+                stats.add("eps_closure.misses")
+            with instrumentation.stage("eps_closure"):
+                self.eps_closures_ = self.build_eps_closures_()
+        elif stats is not None:
+            stats.add("eps_closure.hits")
+        return self.eps_closures_
+
+    def eps_closure(self, states):
+        closures = self.eps_closures()
+        res = set()
+        for state in states:
+            closure = closures.get(state)
+            if closure is None:
+                res.add(state)
+            else:
+                res.update(closure)
+        return frozenset(res)
+
+    def build_eps_closures_(self):
+        """Closures by Tarjan SCC over the eps graph, sinks first."""
+        eps_graph = {}
+        for state, edges in list(self.transition_function.items()):
+            if edges.get(eps):
+                eps_graph[state] = edges[eps]
+
+        closures = {}
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+
+        def visit(state):
+            index[state] = lowlink[state] = len(index)
+            stack.append(state)
+            on_stack.add(state)
+            return state, iter(eps_graph.get(state, ()))
+
+        for root in eps_graph:
+            if root in index:
+                continue
+            work = [visit(root)]
+            while len(work):
+                state, successors = work[-1]
+                for state_to in successors:
+                    if state_to not in index:
+                        work.append(visit(state_to))
+                        break
+                    if state_to in on_stack:
+                        lowlink[state] = min(lowlink[state], index[state_to])
+                else:
+                    work.pop()
+                    if len(work):
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[state])
+                    if lowlink[state] != index[state]:
+                        continue
+                    component = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == state:
+                            break
+                    closure = set(component)
+                    for member in component:
+                        for state_to in eps_graph.get(member, ()):
+                            if state_to not in component:
+                                closure.update(closures[state_to])
+                    closure = frozenset(closure)
+                    for member in component:
+                        closures[member] = closure
+        return closures
 
     def begin(self) -> Iterator:
         return NFA.Iterator(self, {self.start_state})
 
+    def match_tags(self, word):
+        """Tags of all patterns accepting ``word``."""
+        iterator = self.begin()
+        for letter in word:
+            iterator = iterator.transition(letter)
+        return self.tags_of(iterator.states)
+
+    @classmethod
+    def from_tagged(cls, patterns):
+        """One NFA for a {tag: automaton} dict, terminals tagged by their tag."""
+        sigma = set()
+        for finite_automation in patterns.values():
+            sigma.update(finite_automation.sigma)
+        nfa = cls(sigma)
+        nfa.set_start_state(0)
+        offset = 1
+        for tag, finite_automation in patterns.items():
+            mapping = {
+                state: offset + idx
+                for idx, state in enumerate(finite_automation.states)
+            }
+            offset += len(mapping)
+            transitions = []
+            for state, idx in mapping.items():
+                for state_to, letter in finite_automation.get_edges_from(state):
+                    transitions.append((idx, mapping[state_to], letter))
+            nfa.add_transitions(transitions)
+            for state, idx in mapping.items():
+                nfa.add_state(idx)
+            if finite_automation.start_state is not None:
+                nfa.add_transition(0, mapping[finite_automation.start_state], eps)
+            for state in finite_automation.terminal_states:
+                nfa.add_terminal_tag(mapping[state], tag)
+        return nfa
+
     def get_edges_from(self, state):
         res = []
         for letter, next_states in self.transition_function[state].items():
@@ -153,14 +366,14 @@ class NFA(FiniteAutomation):
 
 
 class DFA(FiniteAutomation):
-    @attr.s(frozen=True)
+    @attr.s(frozen=True, slots=True)
     class Iterator(FiniteAutomation.Iterator):
         dfa = attr.ib()
         current_state = attr.ib()
 
         def transition(self, letter):
             return DFA.Iterator(
-                self.dfa, self.dfa.transition_function[self.current_state][letter]
+                self.dfa, self.dfa.next_state_(self.current_state, letter)
             )
 
         def is_terminal(self) -> bool:
@@ -169,16 +382,48 @@ class DFA(FiniteAutomation):
     def __init__(self, sigma, states=None, start_state=None, terminal_states=None):
         super().__init__(sigma, states, start_state, terminal_states)
         self.transition_function = defaultdict(dict)
+        self.letter_classes_ = None
 
     def add_transition(self, state_from, state_to, letter) -> None:
         assert letter in self.sigma
         self.transition_function[state_from][letter] = state_to
         self.states.add(state_to)
         self.states.add(state_from)
+        self.letter_classes_ = None
+
+    def add_transitions_(self, transitions):
+        transition_function = self.transition_function
+        for state_from, state_to, letter in transitions:
+            transition_function[state_from][letter] = state_to
+        self.letter_classes_ = None
+
+    def letter_classes(self):
+        """alphabet_classes of the DFA, cached by from_nfa and minimized."""
+        if self.letter_classes_ is None:
+            return alphabet_classes(self)
+        return self.letter_classes_
 
     def begin(self) -> Iterator:
         return DFA.Iterator(self, self.start_state)
 
+    def accept(self, word) -> bool:
+        """A missing transition rejects the word."""
+        return self.run_(word) in self.terminal_states
+
+    def run_(self, word):
+        """State reached by ``word``, None if a transition is missing."""
+        transition_function = self.transition_function
+        state = self.start_state
+        for letter in word:
+            state = transition_function.get(state, {}).get(letter)
+            if state is None:
+                return None
+        return state
+
+    def match_tags(self, word):
+        """Tags of all patterns accepting ``word``."""
+        return self.tags.get(self.run_(word), frozenset())
+
     def renumbered(self):
         mapping = {}
         renumbered_dfa = DFA(self.sigma)
@@ -195,178 +440,407 @@ class DFA(FiniteAutomation):
 
         for terminal_state in self.terminal_states:
             renumbered_dfa.add_terminal_state(mapping[terminal_state])
+        for state, tags in self.tags.items():
+            renumbered_dfa.tags[mapping[state]] = tags
         if self.start_state is not None:
             renumbered_dfa.set_start_state(mapping[self.start_state])
         return renumbered_dfa
 
-    def reversed_transition_function_(self):
+    def reversed_transition_function_(self, states=None, letters=None):
+        if states is None:
+            states = self.states
         tf_reverse = defaultdict(lambda: defaultdict(set))
-        for u in self.states:
-            for letter, v in self.transition_function[u].items():
+        for u in states:
+            row = self.transition_function[u]
+            if letters is None:
+                edges = row.items()
+            else:
+                edges = ((letter, row[letter]) for letter in letters if letter in row)
+            for letter, v in edges:
                 tf_reverse[v][letter].add(u)
         return tf_reverse
 
     def reachable_states_(self):
-        reachable = set()
-
-        def dfs(state):
-            if state not in reachable:
-                reachable.add(state)
-                for state_to in self.transition_function[state].values():
-                    dfs(state_to)
-
-        dfs(self.start_state)
+        if self.start_state is None:
+            return set()
+        reachable = {self.start_state}
+        queue = deque([self.start_state])
+        while len(queue):
+            state = queue.popleft()
+            for state_to in self.transition_function[state].values():
+                if state_to not in reachable:
+                    reachable.add(state_to)
+                    queue.append(state_to)
         return reachable
 
-    def table_of_unequal_states_(self):
-        queue = deque()
-        marked = defaultdict(lambda: defaultdict(lambda: False))
-        tf_reverse = self.reversed_transition_function_()
-
-        for state_first in self.states:
-            for state_second in self.states:
-                if not marked[state_first][state_second] and (
-                    state_first in self.terminal_states
-                ) != (state_second in self.terminal_states):
-                    marked[state_first][state_second] = marked[state_second][
-                        state_first
-                    ] = True
-                    queue.append((state_first, state_second))
-
+    def live_states_(self, states=None, letters=None):
+        """States of ``states`` from which a terminal state is reachable."""
+        if states is None:
+            states = self.states
+        tf_reverse = self.reversed_transition_function_(states, letters)
+        live = set(self.terminal_states & states)
+        queue = deque(live)
         while len(queue):
-            state_first, state_second = queue.pop()
-            for letter in self.sigma:
-                for from_first in tf_reverse[state_first][letter]:
-                    for from_second in tf_reverse[state_second][letter]:
-                        if not marked[from_first][from_second]:
-                            marked[from_first][from_second] = marked[from_second][
-                                from_first
-                            ] = True
-                            queue.append((from_first, from_second))
-        return marked
-
-    def minimized(self):
-        finite_automation = self
-        if not self.is_full():
-            finite_automation = self.completed_to_full()
-
-        unequal = finite_automation.table_of_unequal_states_()
-        reachable = finite_automation.reachable_states_()
-        component = {state: None for state in finite_automation.states}
+            state = queue.popleft()
+            for states_from in tf_reverse[state].values():
+                for state_from in states_from:
+                    if state_from not in live:
+                        live.add(state_from)
+                        queue.append(state_from)
+        return live
+
+    def table_of_unequal_states_(self, states=None, letters=None):
+        """Table of distinguishable pairs among ``states`` (default: all)."""
+        with instrumentation.stage("table_of_unequal_states") as stats:
+            if states is None:
+                states = self.states
+            if letters is None:
+                letters = [letter_class[0] for letter_class in self.letter_classes()]
+            queue = deque()
+            marked = defaultdict(lambda: defaultdict(lambda: False))
+            tf_reverse = self.reversed_transition_function_(states, letters)
+            state_class = {
+                state: (
+                    self.state_class_(state),
+                    frozenset(
+                        letter
+                        for letter in letters
+                        if self.transition_function[state].get(letter) in states
+                    ),
+                )
+                for state in states
+            }
+
+            for state_first in states:
+                for state_second in states:
+                    if not marked[state_first][state_second] and (
+                        state_class[state_first] != state_class[state_second]
+                    ):
+                        marked[state_first][state_second] = marked[state_second][
+                            state_first
+                        ] = True
+                        queue.append((state_first, state_second))
+
+            while len(queue):
+                state_first, state_second = queue.pop()
+                for letter in letters:
+                    for from_first in tf_reverse[state_first][letter]:
+                        for from_second in tf_reverse[state_second][letter]:
+                            if not marked[from_first][from_second]:
+                                marked[from_first][from_second] = marked[from_second][
+                                    from_first
+                                ] = True
+                                queue.append((from_first, from_second))
+            if stats is not None:
+                stats.add("table_of_unequal_states.pairs", len(states) ** 2)
+            return marked
+
+    def hopcroft_components_(self, states, letters, partial=True):
+        """Block index of every state of ``states``."""
+        with instrumentation.stage("hopcroft"):
+            blocks = defaultdict(set)
+            for state in states:
+                blocks[self.state_class_(state)].add(state)
+            partition = hopcroft_partition(
+                letters,
+                self.reversed_transition_function_(states, letters),
+                list(blocks.values()),
+                partial,
+            )
+            return partition.block_of
+
+    def table_components_(self, states, letters):
+        unequal = self.table_of_unequal_states_(states, letters)
+        component = {}
 
         cnt = 0
-        for state in finite_automation.states:
-            if state not in reachable:
-                continue
-            if component[state] is None:
+        for state in states:
+            if state not in component:
                 component[state] = cnt
                 cnt += 1
-                for diff_state in finite_automation.states:
+                for diff_state in states:
                     if not unequal[state][diff_state]:
                         component[diff_state] = component[state]
-
-        res = DFA(finite_automation.sigma)
-        for state in finite_automation.states:
-            for letter, state_to in finite_automation.transition_function[
-                state
-            ].items():
-                res.add_transition(component[state], component[state_to], letter)
-        if finite_automation.start_state is not None:
-            res.set_start_state(component[finite_automation.start_state])
-        for state in finite_automation.terminal_states:
-            res.add_terminal_state(component[state])
-        return res
+        return component
+
+    def minimized(self, algorithm="hopcroft"):
+        """Minimal DFA of the same language; partial input gives partial output."""
+        with instrumentation.stage("minimized") as stats:
+            classes = self.letter_classes()
+            letters = [letter_class[0] for letter_class in classes]
+            full = self.is_full()
+            reachable = self.reachable_states_()
+            states = self.live_states_(reachable, letters)
+            if algorithm == "hopcroft":
+                component = self.hopcroft_components_(
+                    states, letters, partial=not full or states != reachable
+                )
+            elif algorithm == "table":
+                component = self.table_components_(states, letters)
+            else:
+                raise ValueError("unknown minimization algorithm: {}".format(algorithm))
+            dead_state = len(set(component.values()))
+
+            res = DFA(self.sigma)
+            for state in states:
+                res.add_state(component[state])
+                for letter, state_to in self.transition_function[state].items():
+                    if state_to in states:
+                        res.add_transition(
+                            component[state], component[state_to], letter
+                        )
+            if self.start_state is not None:
+                res.set_start_state(component.get(self.start_state, dead_state))
+            for state in self.terminal_states & states:
+                res.add_terminal_state(component[state])
+            for state, tags in self.tags.items():
+                if state in states:
+                    res.tags[component[state]] = tags
+            if full:
+                for state in list(res.states):
+                    for letter in self.sigma:
+                        if letter not in res.transition_function[state]:
+                            res.add_transition(state, dead_state, letter)
+                for letter in self.sigma:
+                    if dead_state in res.states:
+                        res.add_transition(dead_state, dead_state, letter)
+            # letters equivalent here stay equivalent in the quotient
+            res.letter_classes_ = classes
+            if stats is not None:
+                stats.add("minimized.states_in", len(self.states))
+                stats.add("minimized.states_out", len(res.states))
+            return res
 
     def completed_to_full(self):
-        renumbered = self.renumbered()
-        devils_state = -1
-        for letter in renumbered.sigma:
-            renumbered.add_transition(devils_state, devils_state, letter)
-        for state in renumbered.states:
-            for sigma in renumbered.sigma:
-                if state not in renumbered.transition_function:
-                    renumbered.add_transition(state, devils_state, sigma)
-                if sigma not in renumbered.transition_function[state]:
-                    renumbered.add_transition(state, devils_state, sigma)
-
-        assert renumbered.is_full(), "can not complete to full"
-        return renumbered
+        with instrumentation.stage("completed_to_full") as stats:
+            renumbered = self.renumbered()
+            devils_state = -1
+            added_edges = 0
+            for letter in renumbered.sigma:
+                renumbered.add_transition(devils_state, devils_state, letter)
+            for state in renumbered.states:
+                for sigma in renumbered.sigma:
+                    if state not in renumbered.transition_function:
+                        renumbered.add_transition(state, devils_state, sigma)
+                    if sigma not in renumbered.transition_function[state]:
+                        renumbered.add_transition(state, devils_state, sigma)
+                        added_edges += 1
+
+            assert renumbered.is_full(), "can not complete to full"
+            if stats is not None:
+                stats.add("completed_to_full.added_edges", added_edges)
+            return renumbered
 
     def is_full(self):
         for state in self.states:
-            for letter in self.sigma:
-                if state not in self.transition_function:
-                    return False
-                if letter not in self.transition_function[state]:
-                    return False
-                if self.transition_function[state][letter] not in self.states:
+            row = self.transition_function.get(state)
+            if row is None or len(row) != len(self.sigma):
+                return False
+            for state_to in row.values():
+                if state_to not in self.states:
                     return False
         return True
 
     @classmethod
-    def from_nfa(cls, nfa: NFA):
-        dfa = cls(nfa.sigma, start_state=nfa.begin())
+    def from_nfa(cls, nfa: NFA, max_states=None, workers=None, start_states=None):
+        """Subset construction over bitmask-encoded sets of NFA states."""
+        with instrumentation.stage("from_nfa") as stats:
+            classes = alphabet_classes(nfa)
+            letters = [letter_class[0] for letter_class in classes]
+            bitset = BitsetNFA(nfa, letters, start_states)
+            dfa = cls(nfa.sigma, start_state=0)
+
+            index = {bitset.start: 0}
+            level = [bitset.start]
+            with SubsetExpander(bitset, letters, workers) as expander:
+                while len(level):
+                    if stats is not None:
+                        stats.peak("from_nfa.frontier", len(level))
+                    next_level = []
+                    for mask, next_masks in expander.expand(level):
+                        state = index[mask]
+                        row = dfa.transition_function[state]
+                        if stats is not None:
+                            stats.peak("from_nfa.subset_size", bin(mask).count("1"))
+                        if bitset.is_terminal(mask):
+                            dfa.add_terminal_state(state)
+                            if bitset.tagged:
+                                tags = bitset.tags_of(mask)
+                                if tags:
+                                    dfa.tags[state] = tags
+                        for letter_class, next_mask in zip(classes, next_masks):
+                            next_state = index.get(next_mask)
+                            if next_state is None:
+                                if max_states is not None and len(index) >= max_states:
+                                    raise TooManyStatesError(
+                                        "subset construction exceeds {} states".format(
+                                            max_states
+                                        )
+                                    )
+                                next_state = index[next_mask] = len(index)
+                                next_level.append(next_mask)
+                            row.update(dict.fromkeys(letter_class, next_state))
+                    level = next_level
+            dfa.states.update(range(len(index)))
+            dfa.letter_classes_ = classes
+            if stats is not None:
+                stats.add("from_nfa.nfa_states", len(bitset.states))
+                stats.add("from_nfa.letter_classes", len(classes))
+                stats.add("from_nfa.states", len(index))
+                stats.add("from_nfa.edges", len(index) * len(dfa.sigma))
+            return dfa
 
-        queue = deque({nfa.begin()})
-        used_states = {nfa.begin()}
-        while len(queue):
-            state = queue.popleft()
-            if state.is_terminal():
-                dfa.add_terminal_state(state)
-            for letter in dfa.sigma:
-                next_state = state.transition(letter)
-                dfa.add_transition(state, next_state, letter)
-                if next_state not in used_states:
-                    used_states.add(next_state)
-                    queue.append(next_state)
-        return dfa
+    @classmethod
+    def minimal_from_nfa(cls, nfa: NFA, strategy="subset"):
+        """Minimal complete DFA by "subset" or "brzozowski"."""
+        if strategy == "subset":
+            return cls.from_nfa(nfa).minimized()
+        if strategy == "brzozowski":
+            assert not nfa.tags, "brzozowski strategy does not keep tags"
+            return cls.determinized_reversal_(cls.determinized_reversal_(nfa))
+        raise ValueError("unknown strategy: {}".format(strategy))
+
+    @classmethod
+    def determinized_reversal_(cls, finite_automation):
+        """Subset construction of the reversal from the old terminal states."""
+        reversed_nfa = finite_automation.reversed()
+        start_states = reversed_nfa.transition_function[reversed_nfa.start_state][eps]
+        return cls.from_nfa(reversed_nfa, start_states=start_states)
 
     def reverse_terminal_states(self):
         self.terminal_states = self.states - self.terminal_states
+        self.tags = {}
 
-    def find_not_eq_word(self, other):
-        @attr.s(frozen=True)
-        class TwinIterator(FiniteAutomation.Iterator):
-            iterator_first: FiniteAutomation.Iterator = attr.ib()
-            iterator_second: FiniteAutomation.Iterator = attr.ib()
-
-            def transition(self, letter):
-                return TwinIterator(
-                    self.iterator_first.transition(letter),
-                    self.iterator_second.transition(letter),
-                )
+    def product_(self, other, accepting, minimize=False):
+        """Reachable part of the product automaton, pairs encoded as integers."""
+        assert self.sigma == other.sigma, "Sigma must be same"
+        tables = []
+        for dfa in (self, other):
+            index = {state: idx for idx, state in enumerate(dfa.states)}
+            table = [
+                {
+                    letter: index[state_to]
+                    for letter, state_to in dfa.transition_function[state].items()
+                }
+                for state in dfa.states
+            ]
+            table.append({})
+            terminal = [state in dfa.terminal_states for state in dfa.states]
+            terminal.append(False)
+            start = index.get(dfa.start_state, len(dfa.states))
+            tables.append((table, terminal, start, len(dfa.states)))
+        first_table, first_terminal, first_start, first_dead = tables[0]
+        second_table, second_terminal, second_start, second_dead = tables[1]
+        width = second_dead + 1
+        first_dead_is_dead = not (accepting(False, False) or accepting(False, True))
+        second_dead_is_dead = not (accepting(False, False) or accepting(True, False))
+
+        res = DFA(self.sigma)
+        res.set_start_state(0)
+        start = first_start * width + second_start
+        pair_state = {start: 0}
+        queue = deque([start])
+        while len(queue):
+            pair = queue.popleft()
+            state = pair_state[pair]
+            first, second = divmod(pair, width)
+            if accepting(first_terminal[first], second_terminal[second]):
+                res.add_terminal_state(state)
+            for letter in self.sigma:
+                next_first = first_table[first].get(letter, first_dead)
+                next_second = second_table[second].get(letter, second_dead)
+                if (next_first == first_dead and first_dead_is_dead) or (
+                    next_second == second_dead and second_dead_is_dead
+                ):
+                    continue
+                if next_first == first_dead and next_second == second_dead:
+                    continue
+                next_pair = next_first * width + next_second
+                next_state = pair_state.get(next_pair)
+                if next_state is None:
+                    next_state = pair_state[next_pair] = len(pair_state)
+                    queue.append(next_pair)
+                res.add_transition(state, next_state, letter)
+        return res.minimized() if minimize else res
+
+    def intersect(self, other, minimize=False):
+        return self.product_(other, operator.and_, minimize)
+
+    def union(self, other, minimize=False):
+        return self.product_(other, operator.or_, minimize)
+
+    def difference(self, other, minimize=False):
+        return self.product_(
+            other, lambda first, second: first and not second, minimize
+        )
 
-            def is_terminal(self) -> bool:
-                return (
-                    self.iterator_first.is_terminal()
-                    ^ self.iterator_second.is_terminal()
-                )
+    def symmetric_difference(self, other, minimize=False):
+        return self.product_(other, operator.xor, minimize)
 
-        def dfs(iterator, sigma, current_word, is_used):
-            if iterator in is_used:
-                return None
-            is_used.add(iterator)
-            if iterator.is_terminal():
-                return current_word if current_word else [eps]
-            for letter in sigma:
-                current_word.append(letter)
-                res = dfs(
-                    iterator.transition(letter), sigma, current_word + [letter], is_used
-                )
-                if res:
-                    return res
-                current_word.pop()
+    def next_state_(self, state, letter):
+        """Next state or None if the transition is missing (implicit dead state)."""
+        transitions = self.transition_function.get(state)
+        if transitions is None:
             return None
+        return transitions.get(letter)
 
-        assert self.sigma == other.sigma, "Sigma must be same"
-        first = self.minimized()
-        second = other.minimized()
-        used = set()
-        word = []
-        return dfs(TwinIterator(first.begin(), second.begin()), first.sigma, word, used)
+    def find_not_eq_word(self, other):
+        """Shortest word accepted by exactly one of the DFAs, None if equal."""
+        if self.is_equal_to(other):
+            return None
+
+        start = (self.start_state, other.start_state)
+        parent = {start: None}
+        queue = deque([start])
+        while len(queue):
+            pair = queue.popleft()
+            state_first, state_second = pair
+            if (state_first in self.terminal_states) != (
+                state_second in other.terminal_states
+            ):
+                return word_from_parents_(parent, pair)
+            for letter in self.sigma:
+                next_pair = (
+                    self.next_state_(state_first, letter),
+                    other.next_state_(state_second, letter),
+                )
+                if next_pair not in parent and next_pair != (None, None):
+                    parent[next_pair] = (pair, letter)
+                    queue.append(next_pair)
+        return None
 
     def is_equal_to(self, other):
-        return self.find_not_eq_word(other) is None
+        """Hopcroft-Karp equivalence check with union-find."""
+        assert self.sigma == other.sigma, "Sigma must be same"
+        parent = {}
+
+        def find(node):
+            root = node
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while node != root:
+                parent[node], node = root, parent[node]
+            return root
+
+        # states of the two DFAs are tagged with 0 and 1 so they never collide
+        start = ((0, self.start_state), (1, other.start_state))
+        parent[start[1]] = start[0]
+        stack = [start]
+        while len(stack):
+            (_, state_first), (_, state_second) = stack.pop()
+            if (state_first in self.terminal_states) != (
+                state_second in other.terminal_states
+            ):
+                return False
+            for letter in self.sigma:
+                next_first = (0, self.next_state_(state_first, letter))
+                next_second = (1, other.next_state_(state_second, letter))
+                root_first = find(next_first)
+                root_second = find(next_second)
+                if root_first != root_second:
+                    parent[root_second] = root_first
+                    stack.append((next_first, next_second))
+        return True
 
     def get_edges_from(self, state):
         res = []
@@ -376,5 +850,16 @@ class DFA(FiniteAutomation):
 
     def get_states_from(self, state, letter):
         if letter == eps:
-            return {}
-        return {self.transition_function[state][letter]}
+            return set()
+        next_state = self.next_state_(state, letter)
+        return set() if next_state is None else {next_state}
+
+
+def word_from_parents_(parent, node):
+    """Letters on the BFS tree path to ``node``; [eps] for the root."""
+    word = []
+    while parent[node] is not None:
+        node, letter = parent[node]
+        word.append(letter)
+    word.reverse()
+    return word if word else [eps]
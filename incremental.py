@@ -0,0 +1,147 @@
+from collections import defaultdict
+
+from finite_automations import DFA
+
+
+class IncrementalDictionary(object):
+    """Minimal acyclic partial DFA of a finite set of words, kept minimal
+    while words are added or removed (Daciuk et al., "Incremental
+    construction of minimal acyclic finite-state automata").
+
+    Every edit touches only the path of the edited word: shared states on it
+    are cloned, the path is changed, then it is re-registered bottom-up and
+    merged with equivalent states from the register. Words can come in any
+    order; sorted input is just the case where nothing needs cloning.
+    ``self.dfa`` is always usable for matching.
+    """
+
+    def __init__(self, sigma):
+        self.dfa = DFA(sigma, start_state=0)
+        self.next_state = 1
+        self.register = {}
+        self.indegree = defaultdict(int)
+
+    @classmethod
+    def from_words(cls, sigma, words):
+        dictionary = cls(sigma)
+        for word in words:
+            dictionary.add(word)
+        return dictionary
+
+    def accept(self, word) -> bool:
+        return self.dfa.accept(word)
+
+    def add(self, word):
+        self.check_word_(word)
+        path = self.private_path_(word)
+        state = path[-1]
+        for letter in word[len(path) - 1 :]:
+            child = self.new_state_({}, False)
+            self.set_transition_(state, letter, child)
+            path.append(child)
+            state = child
+        self.dfa.add_terminal_state(state)
+        self.reregister_(path, word)
+
+    def remove(self, word):
+        """Remove ``word``, return False if it was not in the set."""
+        if not self.accept(word):
+            return False
+        path = self.private_path_(word)
+        self.dfa.terminal_states.discard(path[-1])
+        self.reregister_(path, word)
+        return True
+
+    def check_word_(self, word):
+        for letter in word:
+            if letter not in self.dfa.sigma:
+                raise ValueError("letter {!r} is not in sigma".format(letter))
+
+    def signature_(self, state):
+        return (
+            state in self.dfa.terminal_states,
+            tuple(sorted(self.dfa.transition_function[state].items())),
+        )
+
+    def new_state_(self, transitions, terminal):
+        state = self.next_state
+        self.next_state += 1
+        self.dfa.add_state(state)
+        self.dfa.transition_function[state] = dict(transitions)
+        for child in transitions.values():
+            self.indegree[child] += 1
+        if terminal:
+            self.dfa.add_terminal_state(state)
+        return state
+
+    def unregister_(self, state):
+        signature = self.signature_(state)
+        if self.register.get(signature) == state:
+            del self.register[signature]
+
+    def release_(self, state):
+        """Drop one incoming edge of ``state``, deleting it if none remain."""
+        self.indegree[state] -= 1
+        if self.indegree[state] > 0:
+            return
+        stack = [state]
+        while len(stack):
+            state = stack.pop()
+            self.unregister_(state)
+            for child in self.dfa.transition_function.pop(state, {}).values():
+                self.indegree[child] -= 1
+                if self.indegree[child] == 0:
+                    stack.append(child)
+            del self.indegree[state]
+            self.dfa.states.discard(state)
+            self.dfa.terminal_states.discard(state)
+
+    def set_transition_(self, state, letter, child):
+        old_child = self.dfa.transition_function[state].get(letter)
+        self.dfa.transition_function[state][letter] = child
+        self.indegree[child] += 1
+        if old_child is not None:
+            self.release_(old_child)
+
+    def private_path_(self, word):
+        """States along the longest existing prefix of ``word``.
+
+        Shared (confluence) states are cloned so that no other word passes
+        through the returned path, and path states leave the register since
+        the edit will change them.
+        """
+        path = [self.dfa.start_state]
+        for letter in word:
+            child = self.dfa.transition_function[path[-1]].get(letter)
+            if child is None:
+                break
+            if self.indegree[child] > 1:
+                clone = self.new_state_(
+                    self.dfa.transition_function[child],
+                    child in self.dfa.terminal_states,
+                )
+                self.set_transition_(path[-1], letter, clone)
+                child = clone
+            else:
+                self.unregister_(child)
+            path.append(child)
+        return path
+
+    def reregister_(self, path, word):
+        """Register path states bottom-up, merging them with equivalent ones
+        and dropping states that no longer lead to any word."""
+        for depth in range(len(path) - 1, 0, -1):
+            state = path[depth]
+            parent = path[depth - 1]
+            letter = word[depth - 1]
+            transitions = self.dfa.transition_function[state]
+            if state not in self.dfa.terminal_states and not transitions:
+                del self.dfa.transition_function[parent][letter]
+                self.release_(state)
+                continue
+            signature = self.signature_(state)
+            registered = self.register.get(signature)
+            if registered is None:
+                self.register[signature] = state
+            elif registered != state:
+                self.set_transition_(parent, letter, registered)
@@ -0,0 +1,112 @@
+"""Opt-in statistics of the automaton pipeline.
+
+Instrumented code checks ``instrumentation.active`` and does nothing else
+while it is None, so the cost when disabled is one attribute lookup:
+
+    with instrumentation.collect() as stats:
+        DFA.from_nfa(nfa).minimized()
+    print(stats.report())
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from timeit import default_timer
+
+active = None
+
+
+class Stats(object):
+    """Wall time per stage, counters and peak values.
+
+    ``callback(stage, seconds, stats)`` is called whenever a stage ends.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.peaks = defaultdict(int)
+
+    def add(self, name, value=1):
+        self.counters[name] += value
+
+    def peak(self, name, value):
+        if value > self.peaks[name]:
+            self.peaks[name] = value
+
+    def stage_finished_(self, name, seconds):
+        self.times[name] += seconds
+        self.calls[name] += 1
+        if self.callback is not None:
+            self.callback(name, seconds, self)
+
+    def hit_rate(self, name):
+        """Share of ``name.hits`` among ``name.hits + name.misses``."""
+        hits = self.counters[name + ".hits"]
+        total = hits + self.counters[name + ".misses"]
+        return hits / total if total else None
+
+    def report(self):
+        rows = []
+        for name in sorted(self.times):
+            rows.append(
+                "{}: {:.6f}s in {} calls".format(
+                    name, self.times[name], self.calls[name]
+                )
+            )
+        for name in sorted(self.counters):
+            rows.append("{} = {}".format(name, self.counters[name]))
+        for name in sorted(self.peaks):
+            rows.append("{} peak = {}".format(name, self.peaks[name]))
+        return "\n".join(rows)
+
+
+class Stage(object):
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = default_timer()
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        self.stats.stage_finished_(self.name, default_timer() - self.start)
+        return False
+
+
+class NullStage(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+def stage(name):
+    """Context manager timing ``name`` if instrumentation is active.
+
+    It yields the active Stats or None.
+    """
+    if active is None:
+        return NULL_STAGE
+    return Stage(active, name)
+
+
+@contextmanager
+def collect(stats=None, callback=None):
+    """Enable instrumentation inside the with block and yield its Stats."""
+    global active
+    if stats is None:
+        stats = Stats(callback)
+    previous = active
+    active = stats
+    try:
+        yield stats
+    finally:
+        active = previous
@@ -0,0 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+def walk_from_(first, second, prefix, max_len, min_len):
+    """DFS over the trie of words extending ``prefix``, advancing both
+    automata once per trie node. Returns the first word whose acceptance
+    differs or None."""
+    letters = sorted(first.sigma)
+    it_first = first.begin()
+    it_second = second.begin()
+    for letter in prefix:
+        it_first = it_first.transition(letter)
+        it_second = it_second.transition(letter)
+
+    word = list(prefix)
+    base = len(prefix)
+    stack = [(base, None, it_first, it_second)]
+    while stack:
+        depth, letter, it_first, it_second = stack.pop()
+        if depth > base:
+            del word[depth - 1 :]
+            word.append(letter)
+        if depth >= min_len and it_first.is_terminal() != it_second.is_terminal():
+            return "".join(word)
+        if depth < max_len:
+            for letter in reversed(letters):
+                stack.append(
+                    (
+                        depth + 1,
+                        letter,
+                        it_first.transition(letter),
+                        it_second.transition(letter),
+                    )
+                )
+    return None
+
+
+worker_automata_ = None
+
+
+def init_worker_(first, second):
+    global worker_automata_
+    worker_automata_ = (first, second)
+
+
+def walk_in_worker_(prefix, max_len, min_len):
+    first, second = worker_automata_
+    return walk_from_(first, second, prefix, max_len, min_len)
+
+
+def prefixes_(letters, depth):
+    """Words of length <= depth in DFS pre-order."""
+    stack = [""]
+    while stack:
+        prefix = stack.pop()
+        yield prefix
+        if len(prefix) < depth:
+            stack.extend(prefix + letter for letter in reversed(letters))
+
+
+def find_first_mismatch(first, second, max_len, min_len=1, workers=None):
+    """First word with min_len <= len <= max_len (in DFS order over sorted
+    sigma) accepted by exactly one automaton, None if there is none.
+
+    Memory is O(max_len * |sigma|). With ``workers`` > 1 the trie is cut at
+    the depth with at least 4 subtrees per worker; the subtrees are searched
+    by a process pool that receives both automata (which must be picklable)
+    once, and the words above the cut are checked here.
+    """
+    assert first.sigma == second.sigma
+    letters = sorted(first.sigma)
+    if workers is None or workers <= 1 or max_len == 0 or not letters:
+        return walk_from_(first, second, "", max_len, min_len)
+
+    depth = 1
+    while len(letters) ** depth < 4 * workers and depth < max_len:
+        depth += 1
+    prefixes = list(prefixes_(letters, depth))
+    with ProcessPoolExecutor(
+        workers, initializer=init_worker_, initargs=(first, second)
+    ) as executor:
+        futures = [
+            executor.submit(walk_in_worker_, prefix, max_len, min_len)
+            for prefix in prefixes
+            if len(prefix) == depth
+        ]
+        subtrees = iter(futures)
+        try:
+            for prefix in prefixes:
+                if len(prefix) < depth:
+                    word = walk_from_(first, second, prefix, len(prefix), min_len)
+                else:
+                    word = next(subtrees).result()
+                if word is not None:
+                    return word
+        finally:
+            for future in futures:
+                future.cancel()
+    return None
@@ -0,0 +1,47 @@
+import attr
+
+from bitset import BitsetNFA
+from common import Acceptor, LRUCache
+from finite_automations import FiniteAutomation
+
+
+class LazyDFA(Acceptor):
+    """Matches words against an NFA, determinizing it only as far as needed.
+
+    DFA states are bitmasks of NFA states (see BitsetNFA). Discovered
+    transitions are kept in an LRU cache of at most ``cache_size`` entries,
+    so memory stays bounded however large the full DFA would be. The NFA is
+    compiled once: transitions added to it later are not seen.
+    """
+
+    @attr.s(frozen=True, slots=True)
+    class Iterator(FiniteAutomation.Iterator):
+        lazy = attr.ib()
+        mask = attr.ib()
+
+        def transition(self, letter):
+            if not self.mask or letter not in self.lazy.sigma:
+                return LazyDFA.Iterator(self.lazy, 0)
+            return LazyDFA.Iterator(self.lazy, self.lazy.next_state(self.mask, letter))
+
+        def is_terminal(self) -> bool:
+            return self.lazy.bitset.is_terminal(self.mask)
+
+    def __init__(self, nfa, cache_size=10000):
+        self.bitset = BitsetNFA(nfa)
+        self.sigma = nfa.sigma
+        self.cache = LRUCache(cache_size, "lazy_dfa")
+
+    def begin(self) -> Iterator:
+        return LazyDFA.Iterator(self, self.bitset.start)
+
+    def next_state(self, mask, letter):
+        return self.cache.get((mask, letter), self.bitset.step)
+
+    def accept(self, word) -> bool:
+        mask = self.bitset.start
+        for letter in word:
+            if not mask or letter not in self.sigma:
+                return False
+            mask = self.next_state(mask, letter)
+        return self.bitset.is_terminal(mask)
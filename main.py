@@ -1,19 +1,62 @@
+import argparse
+
+import bulk_io
+import instrumentation
 from finite_automations import NFA, DFA
 from conftest import assert_compare_fa
 from latex_format import latex_format
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="NFA -> minimal DFA")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        help="NFA file (*.json or transition list), interactive input if omitted",
+    )
+    parser.add_argument(
+        "-o", "--output", help="write the minimal DFA to this file instead of stdout"
+    )
+    parser.add_argument(
+        "--strategy", choices=("subset", "brzozowski"), default="subset"
+    )
+    parser.add_argument(
+        "--check-len",
+        type=int,
+        default=10,
+        help="compare NFA and DFA on words up to this length, 0 to skip",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print time and size of every stage"
+    )
+    return parser.parse_args()
+
+
 def main():
-    nfa = NFA.from_input()
-    print("-----IN-------")
-    nfa.print()
+    args = parse_args()
+    if args.input:
+        nfa = bulk_io.load(args.input)
+    else:
+        nfa = NFA.from_input()
+    if not args.output:
+        print("-----IN-------")
+        nfa.print()
     with open("tex.in", "w") as tex_in:
         tex_in.write(latex_format(nfa))
 
-    dfa = DFA.from_nfa(nfa).renumbered().minimized()
-    assert_compare_fa(nfa, dfa, 10)  # check on words with len <= 10
-    print("-----OUT-------")
-    dfa.print()
+    if args.stats:
+        with instrumentation.collect() as stats:
+            dfa = DFA.minimal_from_nfa(nfa, args.strategy)
+        print(stats.report())
+    else:
+        dfa = DFA.minimal_from_nfa(nfa, args.strategy)
+    if args.check_len:
+        assert_compare_fa(nfa, dfa, args.check_len)
+    if args.output:
+        bulk_io.save(dfa, args.output)
+    else:
+        print("-----OUT-------")
+        dfa.print()
     with open("tex.out", "w") as out:
         out.write(latex_format(dfa))
 
@@ -0,0 +1,81 @@
+from collections import defaultdict, deque
+
+
+class Partition(object):
+    """Partition of states into disjoint blocks that can only be refined."""
+
+    def __init__(self, blocks):
+        self.blocks = [set(block) for block in blocks if block]
+        self.block_of = {}
+        for idx, block in enumerate(self.blocks):
+            for state in block:
+                self.block_of[state] = idx
+
+    def split(self, block_idx, states):
+        """Split ``states`` (a proper subset) out of the block.
+
+        The smaller half is always the one that moves to the new block, so a
+        state changes its block at most log(n) times.
+        """
+        block = self.blocks[block_idx]
+        moved = states
+        if 2 * len(states) > len(block):
+            moved = block - states
+        block -= moved
+        new_idx = len(self.blocks)
+        self.blocks.append(moved)
+        for state in moved:
+            self.block_of[state] = new_idx
+        return new_idx
+
+    def __len__(self):
+        return len(self.blocks)
+
+
+def hopcroft_partition(sigma, tf_reverse, initial_blocks, partial=False):
+    """Coarsest refinement of ``initial_blocks`` compatible with transitions.
+
+    ``tf_reverse[state][letter]`` is the set of states going to ``state`` by
+    ``letter``. Runs in O(n * |sigma| * log(n)). If ``partial``, transitions
+    may be missing (they go to an implicit dead state outside all blocks);
+    then every initial block is a splitter, as in Valmari and Lehtinen,
+    "Efficient minimization of DFAs with partial transition functions".
+    """
+    partition = Partition(initial_blocks)
+    worklist = deque()
+    in_worklist = set()
+
+    if not len(partition):
+        return partition
+    largest = max(range(len(partition)), key=lambda idx: len(partition.blocks[idx]))
+    for idx in range(len(partition)):
+        if idx == largest and not partial:
+            continue
+        for letter in sigma:
+            worklist.append((idx, letter))
+            in_worklist.add((idx, letter))
+
+    while len(worklist):
+        splitter = worklist.popleft()
+        in_worklist.discard(splitter)
+        block_idx, letter = splitter
+
+        touched = defaultdict(set)
+        for state in list(partition.blocks[block_idx]):
+            for state_from in tf_reverse[state][letter]:
+                touched[partition.block_of[state_from]].add(state_from)
+
+        for idx, states in touched.items():
+            if len(states) == len(partition.blocks[idx]):
+                continue
+            new_idx = partition.split(idx, states)
+            for sigma_letter in sigma:
+                if (idx, sigma_letter) in in_worklist:
+                    candidate = (new_idx, sigma_letter)
+                elif len(partition.blocks[new_idx]) <= len(partition.blocks[idx]):
+                    candidate = (new_idx, sigma_letter)
+                else:
+                    candidate = (idx, sigma_letter)
+                worklist.append(candidate)
+                in_worklist.add(candidate)
+    return partition
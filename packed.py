@@ -0,0 +1,299 @@
+from array import array
+from collections import defaultdict, deque
+
+import attr
+
+from common import Acceptor
+from finite_automations import DFA, FiniteAutomation
+from minimization import hopcroft_partition
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for the batch evaluator
+    numpy = None
+
+NO_STATE = -1
+
+
+def require_numpy_():
+    if numpy is None:
+        raise ImportError("numpy is required for batch evaluation")
+
+
+def all_encoded_words(letters_count, length):
+    """2-D array with every word of the given length over 0..letters_count-1."""
+    require_numpy_()
+    if length == 0:
+        return numpy.zeros((1, 0), dtype=numpy.int32)
+    grid = numpy.indices((letters_count,) * length, dtype=numpy.int32)
+    return grid.reshape(length, -1).T
+
+
+class PackedDFA(Acceptor):
+    """DFA with states 0..n-1, columns 0..k-1 and a flat int32 transition table.
+
+    ``table[state * k + letter_index[letter]]`` is the next state or NO_STATE
+    if the transition is missing. By default every letter has its own column;
+    ``columns`` (the column of each letter) lets equivalent letters share one,
+    then ``letter_index`` is the class-lookup table.
+    """
+
+    @attr.s(frozen=True, slots=True)
+    class Iterator(FiniteAutomation.Iterator):
+        packed = attr.ib()
+        current_state = attr.ib()
+
+        def transition(self, letter):
+            state = self.current_state
+            letter_idx = self.packed.letter_index.get(letter)
+            if state != NO_STATE and letter_idx is not None:
+                state = self.packed.table[
+                    state * self.packed.columns_count + letter_idx
+                ]
+            else:
+                state = NO_STATE
+            return PackedDFA.Iterator(self.packed, state)
+
+        def is_terminal(self) -> bool:
+            state = self.current_state
+            return state != NO_STATE and bool(self.packed.terminal[state])
+
+    def __init__(
+        self, letters, states_count, table, start_state, terminal, columns=None
+    ):
+        self.letters = tuple(letters)
+        if columns is None:
+            columns = range(len(self.letters))
+        self.columns = tuple(columns)
+        self.columns_count = max(self.columns) + 1 if self.columns else 0
+        self.letter_index = dict(zip(self.letters, self.columns))
+        self.states_count = states_count
+        self.table = table
+        self.start_state = start_state
+        self.terminal = terminal
+        self.matrix_ = None
+
+    @classmethod
+    def from_dfa(cls, dfa: DFA, merge_classes=False):
+        """Pack ``dfa``; with ``merge_classes`` equivalent letters share a
+        column (see DFA.letter_classes), which shrinks the table."""
+        if merge_classes:
+            classes = dfa.letter_classes()
+        else:
+            classes = [[letter] for letter in sorted(dfa.sigma)]
+        letters = []
+        columns = []
+        for column, letter_class in enumerate(classes):
+            letters.extend(letter_class)
+            columns.extend([column] * len(letter_class))
+        k = len(classes)
+        mapping = {}
+        for idx, state in enumerate(
+            sorted(dfa.states, key=lambda x: x != dfa.start_state)
+        ):
+            mapping[state] = idx
+
+        table = array("i", [NO_STATE]) * (len(mapping) * k)
+        for state, idx in mapping.items():
+            for letter_idx, letter_class in enumerate(classes):
+                next_state = dfa.transition_function[state].get(letter_class[0])
+                if next_state is not None:
+                    table[idx * k + letter_idx] = mapping[next_state]
+
+        terminal = bytearray(len(mapping))
+        for state in dfa.terminal_states:
+            terminal[mapping[state]] = 1
+        start_state = mapping.get(dfa.start_state, NO_STATE)
+        return cls(letters, len(mapping), table, start_state, terminal, columns)
+
+    def to_dfa(self):
+        dfa = DFA(self.letters)
+        k = self.columns_count
+        for state in range(self.states_count):
+            dfa.add_state(state)
+            for letter, letter_idx in zip(self.letters, self.columns):
+                next_state = self.table[state * k + letter_idx]
+                if next_state != NO_STATE:
+                    dfa.add_transition(state, next_state, letter)
+            if self.terminal[state]:
+                dfa.add_terminal_state(state)
+        if self.start_state != NO_STATE:
+            dfa.set_start_state(self.start_state)
+        return dfa
+
+    @property
+    def sigma(self):
+        return frozenset(self.letters)
+
+    @property
+    def terminal_states(self):
+        return {state for state in range(self.states_count) if self.terminal[state]}
+
+    def begin(self) -> Iterator:
+        return PackedDFA.Iterator(self, self.start_state)
+
+    def accept(self, word) -> bool:
+        table = self.table
+        letter_index = self.letter_index
+        k = self.columns_count
+        state = self.start_state
+        try:
+            for letter in word:
+                if state == NO_STATE:
+                    return False
+                state = table[state * k + letter_index[letter]]
+        except KeyError:
+            return False
+        return state != NO_STATE and bool(self.terminal[state])
+
+    def encode(self, words):
+        """Encode equal-length words as a 2-D int32 array of columns."""
+        require_numpy_()
+        letter_index = self.letter_index
+        rows = [[letter_index[letter] for letter in word] for word in words]
+        if not rows:
+            return numpy.zeros((0, 0), dtype=numpy.int32)
+        return numpy.array(rows, dtype=numpy.int32).reshape(len(rows), -1)
+
+    def transition_matrix_(self):
+        """(n + 1) x k matrix where row n is a dead state replacing NO_STATE."""
+        if self.matrix_ is None:
+            k = self.columns_count
+            dead = self.states_count
+            matrix = numpy.full((self.states_count + 1, k), dead, dtype=numpy.int32)
+            table = numpy.frombuffer(self.table, dtype=numpy.int32)
+            matrix[:dead] = numpy.where(table == NO_STATE, dead, table).reshape(dead, k)
+            self.matrix_ = matrix
+        return self.matrix_
+
+    def accept_array(self, encoded):
+        """Boolean acceptance vector for a 2-D array of encoded words.
+
+        All words are advanced in lock-step, one column (letter position) at
+        a time, by fancy indexing into the transition matrix.
+        """
+        require_numpy_()
+        encoded = numpy.asarray(encoded, dtype=numpy.int32)
+        matrix = self.transition_matrix_()
+        dead = self.states_count
+        terminal = numpy.zeros(dead + 1, dtype=bool)
+        terminal[:dead] = numpy.frombuffer(bytes(self.terminal), dtype=numpy.uint8)
+
+        start_state = dead if self.start_state == NO_STATE else self.start_state
+        states = numpy.full(encoded.shape[0], start_state, dtype=numpy.int32)
+        for column in encoded.T:
+            states = matrix[states, column]
+        return terminal[states]
+
+    def is_full(self):
+        return NO_STATE not in self.table
+
+    def bfs_order_(self):
+        k = self.columns_count
+        order = []
+        used = bytearray(self.states_count)
+        queue = deque()
+        if self.start_state != NO_STATE:
+            used[self.start_state] = 1
+            queue.append(self.start_state)
+        while len(queue):
+            state = queue.popleft()
+            order.append(state)
+            for next_state in self.table[state * k : (state + 1) * k]:
+                if next_state != NO_STATE and not used[next_state]:
+                    used[next_state] = 1
+                    queue.append(next_state)
+        return order
+
+    def renumbered(self):
+        """Copy with states numbered in BFS order from the start state;
+        unreachable states go after reachable ones."""
+        k = self.columns_count
+        states = self.bfs_order_()
+        reachable = set(states)
+        states += [s for s in range(self.states_count) if s not in reachable]
+        mapping = {state: idx for idx, state in enumerate(states)}
+
+        table = array("i", [NO_STATE]) * (len(states) * k)
+        terminal = bytearray(len(states))
+        for idx, state in enumerate(states):
+            for letter_idx in range(k):
+                next_state = self.table[state * k + letter_idx]
+                if next_state != NO_STATE:
+                    table[idx * k + letter_idx] = mapping[next_state]
+            terminal[idx] = self.terminal[state]
+        start_state = mapping.get(self.start_state, NO_STATE)
+        return PackedDFA(
+            self.letters, len(states), table, start_state, terminal, self.columns
+        )
+
+    def minimized(self):
+        """Minimal DFA of the same language, states in BFS order.
+
+        Like DFA.minimized, missing edges stay NO_STATE (an implicit dead
+        state) and only a full input gets a full result.
+        """
+        k = self.columns_count
+        reachable = self.bfs_order_()
+        full = self.is_full()
+
+        tf_reverse = defaultdict(lambda: defaultdict(list))
+        for state in reachable:
+            for letter_idx in range(k):
+                next_state = self.table[state * k + letter_idx]
+                if next_state != NO_STATE:
+                    tf_reverse[next_state][letter_idx].append(state)
+        terminal = {state for state in reachable if self.terminal[state]}
+        live = set(terminal)
+        queue = deque(live)
+        while len(queue):
+            state = queue.popleft()
+            for states_from in tf_reverse[state].values():
+                for state_from in states_from:
+                    if state_from not in live:
+                        live.add(state_from)
+                        queue.append(state_from)
+
+        partition = hopcroft_partition(
+            range(k),
+            tf_reverse,
+            [terminal, live - terminal],
+            partial=not full or len(live) != len(reachable),
+        )
+        representative = {}
+        for state in reachable:
+            if state in live:
+                representative.setdefault(partition.block_of[state], state)
+        blocks = sorted(representative)
+        block_idx = {block: idx for idx, block in enumerate(blocks)}
+        dead_state = len(blocks)
+
+        def target(state):
+            if state == NO_STATE or state not in live:
+                return dead_state if full else NO_STATE
+            return block_idx[partition.block_of[state]]
+
+        start_state = NO_STATE
+        if self.start_state != NO_STATE:
+            start_state = target(self.start_state)
+            if start_state == NO_STATE:
+                start_state = dead_state
+        states_count = len(blocks)
+        if full and len(live) != len(reachable) or start_state == dead_state:
+            states_count += 1
+        table = array("i", [NO_STATE]) * (states_count * k)
+        res_terminal = bytearray(states_count)
+        for block in blocks:
+            state = representative[block]
+            for letter_idx in range(k):
+                table[block_idx[block] * k + letter_idx] = target(
+                    self.table[state * k + letter_idx]
+                )
+            res_terminal[block_idx[block]] = state in terminal
+        if states_count > len(blocks) and full:
+            for letter_idx in range(k):
+                table[dead_state * k + letter_idx] = dead_state
+        res = PackedDFA(
+            self.letters, states_count, table, start_state, res_terminal, self.columns
+        )
+        return res.renumbered()
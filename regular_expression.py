@@ -0,0 +1,180 @@
+from collections import defaultdict
+from functools import lru_cache
+
+from alphabet import char_class
+from finite_automations import NFA
+
+
+class Parser(object):
+    """Recursive descent parser of regular expressions.
+
+    Grammar: alternation ``a|b``, concatenation, postfix ``*``, ``+``, ``?``,
+    groups ``(...)`` (``()`` is the empty word), ``\\`` escaping any
+    character and classes ``[a-z_]``, ``[^0-9]`` (the latter needs sigma).
+    Every letter or class occurrence becomes a numbered position labelled
+    by its set of letters.
+    Concatenation and alternation nodes are n-ary, so only nested groups add
+    recursion depth.
+    """
+
+    def __init__(self, pattern, sigma=None):
+        self.pattern = pattern
+        self.sigma = sigma
+        self.pos = 0
+        self.letters = [None]  # position 0 is the initial state
+
+    def error(self, message):
+        return ValueError(
+            "{} at position {} in {!r}".format(message, self.pos, self.pattern)
+        )
+
+    def peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def parse(self):
+        node = self.parse_alternation()
+        if self.pos != len(self.pattern):
+            raise self.error("unexpected ')'")
+        return node
+
+    def parse_alternation(self):
+        options = [self.parse_concatenation()]
+        while self.peek() == "|":
+            self.pos += 1
+            options.append(self.parse_concatenation())
+        return options[0] if len(options) == 1 else ("alt", options)
+
+    def parse_concatenation(self):
+        parts = []
+        while self.peek() is not None and self.peek() not in "|)":
+            parts.append(self.parse_repetition())
+        if not parts:
+            return ("eps",)
+        return parts[0] if len(parts) == 1 else ("cat", parts)
+
+    def parse_repetition(self):
+        node = self.parse_atom()
+        while self.peek() is not None and self.peek() in "*+?":
+            node = ({"*": "star", "+": "plus", "?": "opt"}[self.peek()], node)
+            self.pos += 1
+        return node
+
+    def parse_atom(self):
+        char = self.peek()
+        if char == "(":
+            self.pos += 1
+            node = self.parse_alternation()
+            if self.peek() != ")":
+                raise self.error("missing ')'")
+            self.pos += 1
+            return node
+        if char in "*+?":
+            raise self.error("nothing to repeat")
+        if char == "[":
+            letters = self.parse_class()
+        else:
+            if char == "\\":
+                self.pos += 1
+                char = self.peek()
+                if char is None:
+                    raise self.error("dangling '\\'")
+            self.pos += 1
+            letters = frozenset(char)
+        self.letters.append(letters)
+        return ("letter", len(self.letters) - 1)
+
+    def parse_class(self):
+        end = self.pattern.find("]", self.pos + 2)
+        if end < 0:
+            raise self.error("missing ']'")
+        spec = self.pattern[self.pos + 1 : end]
+        negated = spec.startswith("^")
+        if negated:
+            if self.sigma is None:
+                raise self.error("negated class needs sigma")
+            letters = self.sigma - char_class(spec[1:])
+        else:
+            letters = char_class(spec)
+        if not letters:
+            raise self.error("empty class")
+        self.pos = end + 1
+        return letters
+
+
+def glushkov_(node, follow):
+    """(nullable, first, last) of ``node``, filling ``follow`` on the way."""
+    kind = node[0]
+    if kind == "eps":
+        return True, set(), set()
+    if kind == "letter":
+        return False, {node[1]}, {node[1]}
+    if kind == "alt":
+        nullable, first, last = False, set(), set()
+        for option in node[1]:
+            option_nullable, option_first, option_last = glushkov_(option, follow)
+            nullable = nullable or option_nullable
+            first |= option_first
+            last |= option_last
+        return nullable, first, last
+    if kind == "cat":
+        nullable, first, last = True, set(), set()
+        for part in node[1]:
+            part_nullable, part_first, part_last = glushkov_(part, follow)
+            for position in last:
+                follow[position] |= part_first
+            if nullable:
+                first |= part_first
+            last = last | part_last if part_nullable else part_last
+            nullable = nullable and part_nullable
+        return nullable, first, last
+
+    nullable, first, last = glushkov_(node[1], follow)
+    if kind in ("star", "plus"):
+        for position in last:
+            follow[position] |= first
+    return nullable or kind != "plus", first, last
+
+
+@lru_cache(maxsize=1024)
+def compile_cached_(pattern, sigma):
+    """(sigma, edges, terminal positions) of the Glushkov automaton."""
+    parser = Parser(pattern, sigma)
+    tree = parser.parse()
+    letters = parser.letters
+    if sigma is None:
+        sigma = frozenset().union(*letters[1:])
+    missing = frozenset().union(*letters[1:]) - sigma
+    if missing:
+        raise ValueError("letter {!r} is not in sigma".format(min(missing)))
+
+    follow = defaultdict(set)
+    nullable, first, last = glushkov_(tree, follow)
+    follow[0] = first
+
+    transitions = []
+    for position, next_positions in follow.items():
+        for next_position in next_positions:
+            for letter in letters[next_position]:
+                transitions.append((position, next_position, letter))
+    terminal = set(last)
+    if nullable:
+        terminal.add(0)
+    return sigma, tuple(transitions), frozenset(terminal)
+
+
+def compile_regex(pattern, sigma=None):
+    """Glushkov (position) automaton of ``pattern``: an NFA without eps edges.
+
+    State 0 is the start state, state i is the i-th letter or class of the pattern.
+    ``sigma`` defaults to the letters of the pattern. Parses are cached by
+    (pattern, sigma); every call returns a new NFA.
+    """
+    if sigma is not None:
+        sigma = frozenset(sigma)
+    sigma, transitions, terminal = compile_cached_(pattern, sigma)
+    nfa = NFA(sigma)
+    nfa.set_start_state(0)
+    nfa.add_transitions(transitions)
+    for position in terminal:
+        nfa.add_terminal_state(position)
+    return nfa
@@ -0,0 +1,120 @@
+import instrumentation
+from common import eps
+from finite_automations import DFA, NFA
+
+
+def sigma_star_prefixed_(finite_automation):
+    """NFA of sigma* L: a copy of the automaton behind a start state that
+    loops on every letter."""
+    mapping = {state: idx for idx, state in enumerate(finite_automation.states)}
+    start_state = len(mapping)
+    nfa = NFA(finite_automation.sigma)
+    nfa.set_start_state(start_state)
+    transitions = [(start_state, start_state, letter) for letter in nfa.sigma]
+    for state, idx in mapping.items():
+        for state_to, letter in finite_automation.get_edges_from(state):
+            transitions.append((idx, mapping[state_to], letter))
+    nfa.add_transitions(transitions)
+    if finite_automation.start_state is not None:
+        nfa.add_transition(start_state, mapping[finite_automation.start_state], eps)
+    for state in finite_automation.terminal_states:
+        nfa.add_terminal_state(mapping[state])
+    return nfa
+
+
+class Searcher(object):
+    """Finds substrings of a text that belong to the language of an automaton.
+
+    Three DFAs are built once: L itself, sigma* L (a terminal state after
+    text[:e] means some match ends at e) and sigma* reversed(L) (run right
+    to left, a terminal state at s means some match starts at s). Letters
+    outside sigma never belong to a match.
+    """
+
+    def __init__(self, finite_automation):
+        if isinstance(finite_automation, DFA):
+            self.dfa = finite_automation.minimized()
+        else:
+            self.dfa = DFA.from_nfa(finite_automation).minimized()
+        self.live = self.dfa.live_states_()
+        self.ends_dfa = DFA.from_nfa(sigma_star_prefixed_(self.dfa)).minimized()
+        self.starts_dfa = DFA.from_nfa(
+            sigma_star_prefixed_(self.dfa.reversed())
+        ).minimized()
+
+    @staticmethod
+    def scan_(dfa, letters):
+        """Yield whether ``dfa`` is in a terminal state before the first
+        letter and after each one, restarting on letters outside sigma."""
+        state = dfa.start_state
+        yield state in dfa.terminal_states
+        for letter in letters:
+            state = dfa.next_state_(state, letter)
+            if state is None:
+                state = dfa.start_state
+            yield state in dfa.terminal_states
+
+    def match_ends(self, text):
+        """Yield every e such that text[s:e] is in L for some s, in one pass."""
+        for end, terminal in enumerate(self.scan_(self.ends_dfa, text)):
+            if terminal:
+                yield end
+
+    def match_starts(self, text):
+        """bytearray with 1 at every s such that text[s:e] is in L for some e."""
+        starts = bytearray(len(text) + 1)
+        scan = self.scan_(self.starts_dfa, reversed(text))
+        for idx, terminal in enumerate(scan):
+            starts[len(text) - idx] = terminal
+        return starts
+
+    def longest_match_end_(self, text, start, failed):
+        """End of the longest match starting at ``start``.
+
+        ``failed`` holds (state, position) pairs from which no later position
+        is accepted; pairs visited after the last accepting position are
+        added to it (Reps, "Maximal-munch tokenization in linear time").
+        """
+        dfa = self.dfa
+        state = dfa.start_state
+        end = start if state in dfa.terminal_states else None
+        trail = []
+        steps = 0
+        for pos in range(start, len(text)):
+            if (state, pos) in failed:
+                break
+            trail.append((state, pos))
+            steps += 1
+            state = dfa.next_state_(state, text[pos])
+            if state is None or state not in self.live:
+                break
+            if state in dfa.terminal_states:
+                end = pos + 1
+                trail = []
+        failed.update(trail)
+        stats = instrumentation.active
+        if stats is not None:
+            stats.add("search.steps", steps)
+        return end
+
+    def finditer(self, text):
+        """Yield (start, end) of non-overlapping leftmost-longest matches.
+
+        Starts of all matches come from one backward pass; from each chosen
+        start the L automaton runs forward to the longest match. Forward runs
+        stop at (state, position) pairs already known to fail, so the total
+        work is O(|states| * len(text)).
+        """
+        starts = self.match_starts(text)
+        failed = set()
+        pos = 0
+        while pos <= len(text):
+            start = starts.find(1, pos)
+            if start < 0:
+                return
+            end = self.longest_match_end_(text, start, failed)
+            yield start, end
+            pos = end if end > start else end + 1
+
+    def findall(self, text):
+        return [text[start:end] for start, end in self.finditer(text)]
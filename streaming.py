@@ -0,0 +1,73 @@
+from finite_automations import DFA
+from packed import NO_STATE, PackedDFA
+
+NEWLINE = ord("\n")
+
+
+def byte_classes_(packed):
+    """Table column of every byte value (read as latin-1), -1 if not in sigma."""
+    classes = []
+    for byte in range(256):
+        classes.append(packed.letter_index.get(chr(byte), -1))
+    return classes
+
+
+def chunks_(source, chunk_size):
+    """Memoryviews over ``source`` without copying its content.
+
+    Binary file objects are read into one reused buffer; anything supporting
+    the buffer protocol (bytes, bytearray, memoryview, mmap) is sliced.
+    """
+    if hasattr(source, "readinto"):
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            size = source.readinto(buffer)
+            if not size:
+                break
+            yield view[:size]
+    else:
+        view = memoryview(source).cast("B")
+        for start in range(0, len(view), chunk_size):
+            yield view[start : start + chunk_size]
+
+
+def scan_lines(dfa, source, chunk_size=1 << 16):
+    """Yield (start, end, accepted) for every line of ``source``.
+
+    ``start`` and ``end`` are byte offsets of the line without its b"\\n".
+    Memory use does not depend on the input size.
+    """
+    if isinstance(dfa, DFA):
+        dfa = PackedDFA.from_dfa(dfa, merge_classes=True)
+    table = dfa.table
+    terminal = dfa.terminal
+    k = dfa.columns_count
+    classes = byte_classes_(dfa)
+
+    state = dfa.start_state
+    line_start = 0
+    offset = 0
+    for chunk in chunks_(source, chunk_size):
+        for idx, byte in enumerate(chunk):
+            if byte == NEWLINE:
+                end = offset + idx
+                yield line_start, end, state != NO_STATE and bool(terminal[state])
+                state = dfa.start_state
+                line_start = end + 1
+            elif state != NO_STATE:
+                letter_idx = classes[byte]
+                if letter_idx < 0:
+                    state = NO_STATE
+                else:
+                    state = table[state * k + letter_idx]
+        offset += len(chunk)
+    if offset > line_start:
+        yield line_start, offset, state != NO_STATE and bool(terminal[state])
+
+
+def matching_lines(dfa, source, chunk_size=1 << 16):
+    """Yield (start, end) byte offsets of the lines accepted by ``dfa``."""
+    for start, end, accepted in scan_lines(dfa, source, chunk_size):
+        if accepted:
+            yield start, end
@@ -1,9 +1,24 @@
+import io
+import mmap
+import pickle
 from copy import deepcopy
 
+import binary_format
+import bulk_io
+import instrumentation
 import pytest
-from conftest import assert_compare_fa
-from finite_automations import DFA, NFA, eps
+from alphabet import alphabet_classes, char_class
+from benchmark import bench_pipeline_once, nth_from_end_nfa, scaling_exponent
+from conftest import assert_compare_fa, words_generator
+from finite_automations import DFA, NFA, TooManyStatesError, eps
+from incremental import IncrementalDictionary
+from language_compare import find_first_mismatch, prefixes_
 from latex_format import build_edges, build_nodes
+from lazy_dfa import LazyDFA
+from packed import PackedDFA
+from regular_expression import compile_regex
+from search import Searcher
+from streaming import matching_lines, scan_lines
 
 
 @pytest.fixture
@@ -240,3 +255,621 @@ def test_equal_border_case():
 
     assert not l_1.is_equal_to(l_2)
     assert not l_2.is_equal_to(l_1)
+
+
+def test_minimization_algorithms_agree(dfa_ab6, dfa_ab4):
+    for dfa in (dfa_ab6, dfa_ab4):
+        hopcroft = dfa.minimized()
+        table = dfa.minimized(algorithm="table")
+        assert len(hopcroft.states) == len(table.states)
+        assert hopcroft.is_equal_to(table)
+        assert_compare_fa(hopcroft, dfa, 10)
+
+
+def test_minimization_unknown_algorithm(dfa_ab6):
+    with pytest.raises(ValueError):
+        dfa_ab6.minimized(algorithm="brute force")
+
+
+def test_packed_roundtrip(dfa_ab6):
+    packed = PackedDFA.from_dfa(dfa_ab6)
+    assert packed.states_count == len(dfa_ab6.states)
+    assert packed.table.itemsize == 4
+    assert packed.is_full()
+    assert_compare_fa(packed, dfa_ab6, 10)
+    assert packed.to_dfa().is_equal_to(dfa_ab6)
+
+
+def test_packed_minimized(dfa_ab6):
+    packed = PackedDFA.from_dfa(dfa_ab6).minimized()
+    assert packed.start_state == 0
+    assert packed.is_full()
+    assert packed.states_count == len(dfa_ab6.minimized().states)
+    assert_compare_fa(packed, dfa_ab6, 10)
+
+
+def test_packed_partial():
+    dfa = DFA("ab")
+    dfa.set_start_state(0)
+    dfa.add_transition(0, 1, "a")
+    dfa.add_transition(1, 1, "b")
+    dfa.add_terminal_state(1)
+    packed = PackedDFA.from_dfa(dfa)
+    assert not packed.is_full()
+    assert packed.accept("abb")
+    assert not packed.accept("ba")
+    minimized = packed.minimized()
+    assert not minimized.is_full()
+    assert minimized.states_count == 2
+    assert_compare_fa(minimized, packed, 6)
+
+
+def test_dfa_accept_partial():
+    dfa = DFA("ab")
+    dfa.set_start_state(0)
+    dfa.add_transition(0, 1, "a")
+    dfa.add_terminal_state(1)
+    assert dfa.accept("a")
+    assert not dfa.accept("ab")
+    assert not dfa.accept("c")
+    assert dict(dfa.transition_function) == {0: {"a": 1}}
+    assert not DFA("ab").accept("a")
+
+
+def test_accept_many(nfa_ab6, dfa_ab6):
+    words = ["a", "ab", "aaa", "b", "aaaa", ""]
+    expected = [nfa_ab6.accept(word) for word in words]
+    assert list(dfa_ab6.accept_many(iter(words))) == expected
+    assert list(PackedDFA.from_dfa(dfa_ab6).accept_many(words)) == expected
+    assert list(nfa_ab6.accept_many(words)) == expected
+
+
+def test_packed_accept_array(dfa_ab6):
+    numpy = pytest.importorskip("numpy")
+    from packed import all_encoded_words
+
+    packed = PackedDFA.from_dfa(dfa_ab6)
+    for length in range(0, 8):
+        encoded = all_encoded_words(len(packed.letters), length)
+        words = ["".join(packed.letters[idx] for idx in row) for row in encoded]
+        expected = numpy.array([dfa_ab6.accept(word) for word in words])
+        assert (packed.accept_array(encoded) == expected).all()
+    assert list(packed.accept_array(packed.encode(["ab", "ba", "aa"]))) == [
+        True,
+        False,
+        False,
+    ]
+
+
+def test_packed_accept_array_partial():
+    pytest.importorskip("numpy")
+    dfa = DFA("ab")
+    dfa.set_start_state(0)
+    dfa.add_transition(0, 1, "a")
+    dfa.add_terminal_state(1)
+    packed = PackedDFA.from_dfa(dfa)
+    assert list(packed.accept_array(packed.encode(["a", "b"]))) == [True, False]
+    assert list(packed.accept_array(packed.encode(["ab", "aa"]))) == [False, False]
+
+
+def test_eps_closures(nfa_ab6_many_eps):
+    closures = nfa_ab6_many_eps.eps_closures()
+    assert closures[0] == {0, 6, 7, 12}
+    assert closures[3] == {1, 3, 10, 13, 18, 19, 21}
+    assert closures[9] == {1, 9, 10}
+    assert nfa_ab6_many_eps.eps_closures() is closures
+    assert nfa_ab6_many_eps.eps_closure({4, 9}) == {1, 4, 9, 10}
+
+
+def test_eps_closures_invalidated():
+    nfa = NFA("a")
+    nfa.add_transition(0, 1, eps)
+    assert nfa.eps_closure({0}) == {0, 1}
+    nfa.add_transition(1, 2, "a")
+    assert nfa.eps_closure({0}) == {0, 1}
+    nfa.add_transition(1, 3, eps)
+    nfa.add_transition(3, 0, eps)
+    assert nfa.eps_closure({0}) == {0, 1, 3}
+    assert nfa.eps_closure({3}) == {0, 1, 3}
+
+
+def test_dfa_from_nfa_integer_states(nfa_ab6_many_eps):
+    dfa = DFA.from_nfa(nfa_ab6_many_eps)
+    assert dfa.start_state == 0
+    assert dfa.states == set(range(len(dfa.states)))
+    assert_compare_fa(nfa_ab6_many_eps, dfa, 10)
+
+
+def test_dfa_from_nfa_max_states(nfa_ab6):
+    states_count = len(DFA.from_nfa(nfa_ab6).states)
+    assert len(DFA.from_nfa(nfa_ab6, max_states=states_count).states) == states_count
+    with pytest.raises(TooManyStatesError):
+        DFA.from_nfa(nfa_ab6, max_states=states_count - 1)
+
+
+def test_lazy_dfa(nfa_ab6_many_eps):
+    lazy = LazyDFA(nfa_ab6_many_eps)
+    assert_compare_fa(lazy, nfa_ab6_many_eps, 10)
+    assert lazy.cache.hits > lazy.cache.misses
+    assert not lazy.accept("abc")
+
+
+def test_lazy_dfa_eviction(nfa_ab6):
+    lazy = LazyDFA(nfa_ab6, cache_size=2)
+    assert_compare_fa(lazy, nfa_ab6, 8)
+    assert len(lazy.cache) == 2
+
+
+def chain_dfa(length, terminal):
+    dfa = DFA("ab")
+    dfa.set_start_state(0)
+    for state in range(length):
+        dfa.add_transition(state, state + 1, "a")
+        dfa.add_transition(state, length + 1, "b")
+    dfa.add_transition(length, length + 1, "a")
+    dfa.add_transition(length, length + 1, "b")
+    dfa.add_transition(length + 1, length + 1, "a")
+    dfa.add_transition(length + 1, length + 1, "b")
+    dfa.add_terminal_state(terminal)
+    return dfa
+
+
+def test_long_chain_is_stack_safe():
+    first = chain_dfa(5000, 5000)
+    second = chain_dfa(5000, 4999)
+    assert len(first.reachable_states_()) == 5002
+    assert len(first.minimized().states) == 5002
+    assert first.find_not_eq_word(second) == ["a"] * 4999
+
+
+def test_find_not_eq_word_shortest(dfa_ab6, dfa_ab4):
+    word = dfa_ab6.find_not_eq_word(dfa_ab4)
+    assert word == [eps]
+    assert dfa_ab6.find_not_eq_word(dfa_ab6.renumbered()) is None
+
+
+def test_equal_partial_dfa():
+    partial = DFA("ab")
+    partial.set_start_state(0)
+    partial.add_transition(0, 1, "a")
+    partial.add_transition(1, 2, "b")
+    partial.add_terminal_state(2)
+    full = partial.completed_to_full()
+    assert partial.is_equal_to(full)
+    assert full.is_equal_to(partial)
+    assert partial.find_not_eq_word(full) is None
+
+    other = DFA("ab")
+    other.set_start_state("s")
+    other.add_transition("s", "a", "a")
+    other.add_transition("a", "ab", "b")
+    other.add_transition("ab", "aba", "a")
+    other.add_terminal_state("ab")
+    other.add_terminal_state("aba")
+    assert not partial.is_equal_to(other)
+    assert partial.find_not_eq_word(other) == ["a", "b", "a"]
+
+
+def test_scan_lines(dfa_ab6):
+    text = b"a\nab\nb\n\naaab\nabc"
+    lines = text.split(b"\n")
+    expected = [dfa_ab6.accept(line.decode()) for line in lines]
+    for chunk_size in (1, 3, 1 << 16):
+        for source in (text, bytearray(text), memoryview(text), io.BytesIO(text)):
+            result = list(scan_lines(dfa_ab6, source, chunk_size))
+            assert [accepted for _, _, accepted in result] == expected
+            assert [text[start:end] for start, end, _ in result] == lines
+
+
+def test_matching_lines_mmap(dfa_ab6, tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_bytes(b"b\naaab\nx\nab\n")
+    with open(str(path), "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert list(matching_lines(dfa_ab6, mapped, 4)) == [(2, 6), (9, 11)]
+
+
+def test_compile_regex(nfa_ab6):
+    nfa = compile_regex("a(b|a(ab)*a(ab)*)*")
+    assert all(not nfa.transition_function[state][eps] for state in nfa.states)
+    assert_compare_fa(nfa, nfa_ab6, 10)
+    again = compile_regex("a(b|a(ab)*a(ab)*)*")
+    assert again is not nfa
+    assert again.states == nfa.states
+    for state in nfa.states:
+        assert sorted(again.get_edges_from(state)) == sorted(nfa.get_edges_from(state))
+    nfa.add_terminal_state(0)
+    assert nfa.accept("")
+    assert not compile_regex("a(b|a(ab)*a(ab)*)*").accept("")
+
+
+def test_compile_regex_operators():
+    nfa = compile_regex("(a|b)+c?|()", sigma="abc")
+    assert nfa.sigma == frozenset("abc")
+    assert nfa.accept("")
+    assert nfa.accept("abba")
+    assert nfa.accept("bc")
+    assert not nfa.accept("c")
+    assert not nfa.accept("acc")
+    escaped = compile_regex("\\*a\\(")
+    assert escaped.accept("*a(")
+    assert not escaped.accept("a(")
+
+
+def test_compile_regex_errors():
+    for pattern in ("(ab", "ab)", "*a", "a\\"):
+        with pytest.raises(ValueError):
+            compile_regex(pattern)
+    with pytest.raises(ValueError):
+        compile_regex("abc", sigma="ab")
+
+
+def test_dfa_set_operations():
+    first = DFA.from_nfa(compile_regex("(a|b)*a", sigma="ab"))
+    second = DFA("ab")
+    second.set_start_state(0)
+    second.add_transition(0, 1, "a")
+    second.add_transition(1, 0, "b")
+    second.add_terminal_state(1)
+    operations = {
+        "intersect": lambda x, y: x and y,
+        "union": lambda x, y: x or y,
+        "difference": lambda x, y: x and not y,
+        "symmetric_difference": lambda x, y: x != y,
+    }
+    for name, expected in operations.items():
+        for minimize in (False, True):
+            result = getattr(first, name)(second, minimize=minimize)
+            for word in [""] + words_generator(8, "ab"):
+                assert result.accept(word) == expected(
+                    first.accept(word), second.accept(word)
+                )
+    assert len(first.intersect(second, minimize=True).states) == 2
+    assert first.difference(first).find_not_eq_word(DFA("ab")) is None
+
+
+def test_reversed(nfa_ab6_many_eps, dfa_ab4):
+    for fa in (nfa_ab6_many_eps, dfa_ab4):
+        reversed_fa = fa.reversed()
+        for word in [""] + words_generator(8, "ab"):
+            assert reversed_fa.accept(word[::-1]) == fa.accept(word)
+
+
+def test_minimal_from_nfa_strategies(nfa_ab6_many_eps):
+    subset = DFA.minimal_from_nfa(nfa_ab6_many_eps)
+    brzozowski = DFA.minimal_from_nfa(nfa_ab6_many_eps, strategy="brzozowski")
+    assert len(subset.states) == len(brzozowski.states)
+    assert brzozowski.is_full()
+    assert brzozowski.is_equal_to(subset)
+    assert_compare_fa(brzozowski, nfa_ab6_many_eps, 10)
+    with pytest.raises(ValueError):
+        DFA.minimal_from_nfa(nfa_ab6_many_eps, strategy="unknown")
+
+    empty = NFA("ab")
+    empty.set_start_state(0)
+    empty.add_transition(0, 1, "a")
+    for nfa in [nth_from_end_nfa(n) for n in range(1, 7)] + [empty]:
+        subset = DFA.minimal_from_nfa(nfa)
+        brzozowski = DFA.minimal_from_nfa(nfa, strategy="brzozowski")
+        assert len(subset.states) == len(brzozowski.states)
+        assert brzozowski.is_equal_to(subset)
+
+
+def test_binary_format_roundtrip(dfa_ab6, tmp_path):
+    dfa = dfa_ab6.minimized()
+    path = str(tmp_path / "ab6.dfa")
+    binary_format.save(dfa, path)
+    loaded = binary_format.load(path)
+    assert loaded.letters == ("a", "b")
+    assert loaded.states_count == len(dfa.states)
+    assert loaded.is_full()
+    assert_compare_fa(loaded, dfa, 10)
+    assert loaded.to_dfa().is_equal_to(dfa)
+    assert list(matching_lines(loaded, b"aaab\nb\n")) == [(0, 4)]
+
+
+def test_binary_format_partial():
+    dfa = DFA("ab")
+    dfa.set_start_state(0)
+    dfa.add_transition(0, 1, "a")
+    for state in range(1, 10):
+        dfa.add_transition(state, state + 1, "b")
+    dfa.add_terminal_state(10)
+    buffer = io.BytesIO()
+    binary_format.dump(dfa, buffer)
+    loaded = binary_format.loads(buffer.getvalue())
+    assert loaded.accept("a" + "b" * 9)
+    assert not loaded.accept("a" + "b" * 8)
+    assert not loaded.accept("b")
+    assert loaded.minimized().states_count == 11
+
+
+def test_binary_format_errors():
+    with pytest.raises(ValueError):
+        binary_format.loads(b"junk")
+    with pytest.raises(ValueError):
+        binary_format.loads(b"X" * 64)
+
+
+def test_add_transitions():
+    nfa = NFA("ab")
+    nfa.add_transitions([(0, 1, "a"), (1, 0, eps), (1, 1, "b")])
+    assert nfa.states == {0, 1}
+    assert nfa.transition_function[1]["b"] == {1}
+    assert nfa.eps_closure({1}) == {0, 1}
+    with pytest.raises(ValueError):
+        nfa.add_transitions([(1, 2, "a"), (2, 3, "c")])
+    assert 2 not in nfa.states
+    with pytest.raises(ValueError):
+        DFA("ab").add_transitions([(0, 1, eps)])
+
+
+def test_bulk_io_roundtrip(nfa_ab6_many_eps, tmp_path):
+    for name in ("ab6.txt", "ab6.json"):
+        path = str(tmp_path / name)
+        bulk_io.save(nfa_ab6_many_eps, path)
+        loaded = bulk_io.load(path)
+        assert loaded.states == nfa_ab6_many_eps.states
+        assert loaded.terminal_states == {1}
+        assert_compare_fa(loaded, nfa_ab6_many_eps, 8)
+        dfa = DFA.minimal_from_nfa(loaded)
+        bulk_io.save(dfa, path)
+        assert bulk_io.load(path, DFA).is_equal_to(dfa)
+
+
+def test_bulk_io_transition_list():
+    text = "ab\n0 1 a\n1 1 b\n1 2 eps\nend\n0\n2\n"
+    nfa = bulk_io.read_transition_list(io.StringIO(text))
+    assert nfa.accept("abb")
+    assert not nfa.accept("b")
+    with pytest.raises(ValueError, match="line 2"):
+        bulk_io.read_transition_list(io.StringIO("ab\n0 1 c\nend\n0\n1\n"))
+    with pytest.raises(ValueError, match="line 2"):
+        bulk_io.read_transition_list(io.StringIO("ab\n0 x a\nend\n0\n1\n"))
+    with pytest.raises(ValueError, match="line 4"):
+        bulk_io.read_transition_list(io.StringIO("ab\n0 1 a\nend\nx\n1\n"))
+    with pytest.raises(ValueError, match="line 5"):
+        bulk_io.read_transition_list(io.StringIO("ab\n0 1 a\nend\n0\n1 y\n"))
+    with pytest.raises(ValueError):
+        bulk_io.read_transition_list(io.StringIO("ab\n0 1 a\n"))
+
+
+def test_nth_from_end_generator():
+    nfa = nth_from_end_nfa(3)
+    for word in words_generator(7, "ab"):
+        assert nfa.accept(word) == (len(word) >= 3 and word[-3] == "a")
+    assert len(DFA.minimal_from_nfa(nfa).states) == 8
+
+
+def test_bench_pipeline_once():
+    times, dfa_states, min_dfa_states = bench_pipeline_once(nth_from_end_nfa(4), ["ab"])
+    assert set(times) >= {"from_nfa", "minimized", "latex_format"}
+    assert dfa_states == min_dfa_states == 16
+    assert scaling_exponent([(10, 1.0), (100, 10.0), (1000, 100.0)]) == pytest.approx(1)
+
+
+def test_instrumentation(nfa_ab6_many_eps):
+    stages = []
+    with instrumentation.collect(
+        callback=lambda name, seconds, stats: stages.append(name)
+    ) as stats:
+        dfa = DFA.from_nfa(nfa_ab6_many_eps)
+        dfa.minimized(algorithm="table")
+        partial = DFA("ab")
+        partial.add_transition(0, 0, "a")
+        partial.set_start_state(0)
+        partial.minimized()
+        nfa_ab6_many_eps.accept("aaab")
+    assert instrumentation.active is None
+    assert {
+        "from_nfa",
+        "minimized",
+        "table_of_unequal_states",
+        "hopcroft",
+    } <= set(stages)
+    assert "completed_to_full" not in stages
+    assert stats.counters["from_nfa.states"] == len(dfa.states)
+    assert stats.peaks["from_nfa.subset_size"] > 1
+    assert stats.hit_rate("eps_closure") > 0.5
+    assert "from_nfa" in stats.report()
+
+
+def test_instrumentation_disabled(nfa_ab6):
+    assert instrumentation.stage("from_nfa") is instrumentation.NULL_STAGE
+    with instrumentation.stage("from_nfa") as stats:
+        assert stats is None
+
+
+def test_dfa_from_nfa_parallel(nfa_ab6_many_eps):
+    nfa = nth_from_end_nfa(8)
+    serial = DFA.from_nfa(nfa)
+    parallel = DFA.from_nfa(nfa, workers=2)
+    assert len(parallel.states) == len(serial.states) == 2**8
+    assert parallel.terminal_states == serial.terminal_states
+    assert parallel.is_equal_to(serial)
+    small = DFA.from_nfa(nfa_ab6_many_eps, workers=2)
+    assert_compare_fa(small, nfa_ab6_many_eps, 8)
+    with pytest.raises(TooManyStatesError):
+        DFA.from_nfa(nfa, max_states=100, workers=2)
+
+
+def test_find_first_mismatch(nfa_ab6, nfa_ab4, dfa_ab6):
+    assert find_first_mismatch(nfa_ab6, dfa_ab6, 10) is None
+    word = find_first_mismatch(nfa_ab6, nfa_ab4, 6)
+    assert nfa_ab6.accept(word) != nfa_ab4.accept(word)
+    assert find_first_mismatch(nfa_ab6, nfa_ab4, 6, min_len=0) == ""
+    with pytest.raises(AssertionError):
+        assert_compare_fa(nfa_ab6, nfa_ab4, 3)
+
+
+def test_find_first_mismatch_workers(nfa_ab6, nfa_ab6_many_eps, nfa_ab4):
+    restored = pickle.loads(pickle.dumps(nfa_ab6_many_eps))
+    assert restored.transition_function[0][eps] == {6, 7}
+    assert restored.eps_closure({0}) == nfa_ab6_many_eps.eps_closure({0})
+    assert find_first_mismatch(nfa_ab6, nfa_ab6_many_eps, 8, workers=2) is None
+    for workers, min_len in [(2, 1), (4, 0), (4, 3)]:
+        assert find_first_mismatch(
+            nfa_ab6, nfa_ab4, 6, min_len, workers
+        ) == find_first_mismatch(nfa_ab6, nfa_ab4, 6, min_len)
+    assert list(prefixes_("ab", 2)) == ["", "a", "aa", "ab", "b", "ba", "bb"]
+
+
+def test_incremental_dictionary_sorted():
+    words = ["", "ab", "abb", "bab", "babb", "bb"]
+    dictionary = IncrementalDictionary.from_words("ab", words)
+    for word in [""] + words_generator(5, "ab"):
+        assert dictionary.accept(word) == (word in words)
+    assert len(dictionary.dfa.states) == len(dictionary.dfa.minimized().states)
+
+
+def test_incremental_dictionary_edits():
+    dictionary = IncrementalDictionary.from_words("ab", ["aa", "ba"])
+    assert len(dictionary.dfa.states) == 3
+    dictionary.add("a")
+    assert dictionary.accept("a") and dictionary.accept("aa")
+    assert not dictionary.accept("b")
+    assert len(dictionary.dfa.states) == 4
+    assert dictionary.remove("a")
+    assert not dictionary.remove("a")
+    assert len(dictionary.dfa.states) == 3
+    assert dictionary.remove("aa") and dictionary.remove("ba")
+    assert dictionary.dfa.states == {dictionary.dfa.start_state}
+    with pytest.raises(ValueError):
+        dictionary.add("abc")
+
+
+def test_tagged_patterns():
+    patterns = {
+        "ends_ab": compile_regex("(a|b)*ab", sigma="ab"),
+        "only_a": compile_regex("a+", sigma="ab"),
+        "ends_b": compile_regex("(a|b)*b", sigma="ab"),
+    }
+    nfa = NFA.from_tagged(patterns)
+    dfa = DFA.from_nfa(nfa)
+    for algorithm in ("hopcroft", "table"):
+        minimal = dfa.renumbered().minimized(algorithm=algorithm)
+        for word in [""] + words_generator(6, "ab"):
+            expected = {tag for tag, fa in patterns.items() if fa.accept(word)}
+            assert nfa.match_tags(word) == expected
+            assert dfa.match_tags(word) == expected
+            assert minimal.match_tags(word) == expected
+    untagged = deepcopy(dfa)
+    untagged.tags = {}
+    assert len(untagged.minimized().states) < len(minimal.states)
+    assert dfa.renumbered().match_tags("bab") == {"ends_ab", "ends_b"}
+
+
+def test_search():
+    searcher = Searcher(compile_regex("ab|b|abc", sigma="abc"))
+    text = "xabcbab"
+    assert list(searcher.match_ends(text)) == [3, 4, 5, 7]
+    assert [s for s in range(len(text) + 1) if searcher.match_starts(text)[s]] == [
+        1,
+        2,
+        4,
+        5,
+        6,
+    ]
+    assert list(searcher.finditer(text)) == [(1, 4), (4, 5), (5, 7)]
+    assert searcher.findall(text) == ["abc", "b", "ab"]
+
+    searcher = Searcher(compile_regex("a*", sigma="ab"))
+    assert list(searcher.finditer("baab")) == [(0, 0), (1, 3), (3, 3), (4, 4)]
+    for text in words_generator(6, "ab"):
+        for start, end in Searcher(nth_from_end_nfa(2)).finditer(text):
+            assert nth_from_end_nfa(2).accept(text[start:end])
+
+    searcher = Searcher(compile_regex("a|a*b"))
+    steps = []
+    for size in (1000, 4000):
+        with instrumentation.collect() as stats:
+            assert searcher.findall("a" * size) == ["a"] * size
+        steps.append(stats.counters["search.steps"])
+    assert steps[1] <= 5 * steps[0]
+
+
+def test_character_classes():
+    sigma = [chr(code) for code in range(32, 127)]
+    assert char_class("a-c_-") == frozenset("abc_-")
+    nfa = compile_regex("[a-z]+[^a-z ]?", sigma=sigma)
+    assert len(alphabet_classes(nfa)) == 3
+    with pytest.raises(ValueError):
+        compile_regex("[^a]")
+
+    dfa = DFA.from_nfa(nfa).minimized()
+    assert len(dfa.states) == 4
+    assert dfa.letter_classes() == alphabet_classes(dfa)
+    letters = [letter_class[0] for letter_class in dfa.letter_classes()]
+    tf_reverse = dfa.reversed_transition_function_(letters=letters)
+    assert all(len(edges) <= 3 for edges in tf_reverse.values())
+    packed = PackedDFA.from_dfa(dfa, merge_classes=True)
+    assert packed.columns_count == 3
+    buffer = io.BytesIO()
+    binary_format.dump(packed, buffer)
+    loaded = binary_format.loads(buffer.getvalue())
+    for word in ["abc", "ab1", "a ", "A", "", "zz!x"]:
+        expected = nfa.accept(word)
+        assert dfa.accept(word) == packed.accept(word) == expected
+        assert loaded.accept(word) == loaded.to_dfa().accept(word) == expected
+    assert list(matching_lines(dfa, b"abc\nab1\nab 1\n")) == [(0, 3), (4, 7)]
+
+
+def test_minimized_partial(capsys):
+    words = ["car", "cat", "bar", "bat", "at"]
+    trie = DFA("abcrt")
+    trie.set_start_state("")
+    for word in words:
+        for idx, letter in enumerate(word):
+            trie.add_transition(word[:idx], word[: idx + 1], letter)
+        trie.add_terminal_state(word)
+    trie.add_transition("c", "cc", "c")
+    stages = []
+    with instrumentation.collect(callback=lambda name, *_: stages.append(name)):
+        for algorithm in ("hopcroft", "table"):
+            minimal = trie.minimized(algorithm=algorithm)
+            assert not minimal.is_full()
+            assert len(minimal.states) == 5
+            assert minimal.is_equal_to(trie)
+    assert "completed_to_full" not in stages
+    packed = PackedDFA.from_dfa(trie).minimized()
+    assert packed.states_count == 5
+    assert_compare_fa(packed, trie, 4)
+
+    partial = DFA("ab")
+    partial.set_start_state(0)
+    partial.add_transition(0, 1, "a")
+    partial.add_terminal_state(1)
+    partial.minimized().print()
+    out, _ = capsys.readouterr()
+    assert out.splitlines()[1].split("|")[2:5] == ["0", "1", " "]
+
+    dead = DFA("ab")
+    dead.set_start_state(0)
+    dead.add_transition(0, 1, "a")
+    assert dead.minimized().states == {dead.minimized().start_state}
+    dead.add_transition(0, 0, "b")
+    dead.add_transition(1, 1, "a")
+    dead.add_transition(1, 1, "b")
+    assert len(dead.minimized().states) == 1
+    assert dead.minimized().is_full()
+
+
+def test_nfa_transition_memo(nfa_ab6):
+    nfa = deepcopy(nfa_ab6)
+    iterator = nfa.begin()
+    assert not hasattr(iterator, "__dict__")
+    assert not hasattr(DFA("a").begin(), "__dict__")
+    words = words_generator(6, "ab")
+    expected = [nfa_ab6.accept(word) for word in words]
+    with instrumentation.collect() as stats:
+        assert list(nfa.accept_many(words)) == expected
+    assert nfa.transition_memo.hits > nfa.transition_memo.misses
+    assert stats.counters["nfa_transition.hits"] == nfa.transition_memo.hits
+    assert iterator.transition("a") is iterator.transition("a")
+
+    nfa.transition_memo.size = 1
+    nfa.add_transition(nfa.start_state, nfa.start_state, "b")
+    assert not nfa.transition_memo
+    assert list(nfa.accept_many(words))
+    assert len(nfa.transition_memo) == 1
+    assert pickle.loads(pickle.dumps(nfa)).accept("ab")